@@ -1,8 +1,6 @@
 import streamlit as st
-import pickle
-import pandas as pd
+import json
 import numpy as np
-import plotly.graph_objects as go
 
 st.set_page_config(
     page_title="RetainIQ · Customer Retention Analytics",
@@ -83,41 +81,63 @@ h1,h2,h3,h4 { color:#F9FAFB!important; font-family:'Syne',sans-serif!important;
 """, unsafe_allow_html=True)
 
 # ── Feature Config ───────
-FEATURE_NAMES = [
-    'SeniorCitizen','Partner','Dependents','tenure',
-    'PhoneService','MultipleLines','OnlineSecurity','OnlineBackup',
-    'DeviceProtection','TechSupport','StreamingTV','StreamingMovies',
-    'PaperlessBilling','MonthlyCharges','TotalCharges','gender_Male',
-    'InternetService_Fiber optic','InternetService_No',
-    'Contract_One year','Contract_Two year',
-    'PaymentMethod_Credit card (automatic)',
-    'PaymentMethod_Electronic check','PaymentMethod_Mailed check'
-]
-NUM_FEATURES = ['tenure','MonthlyCharges','TotalCharges']
-SCALE_STATS  = {
-    'tenure':{'mean':32.49,'std':24.57},
-    'MonthlyCharges':{'mean':64.93,'std':30.14},
-    'TotalCharges':{'mean':2299.33,'std':2279.00}
-}
+from retainiq.config import FEATURE_NAMES, MEDIUM_RISK, HIGH_RISK
+from retainiq.encoding import FeatureEncoder
+from retainiq.artifacts import PORTFOLIO_PATH, fingerprint, load_for_scoring
+from retainiq.cache import PredictionCache
+from retainiq.metrics import METRICS
+from retainiq.charts import gauge_figure, importance_figure, patch_gauge, portfolio_figure, whatif_heatmap
+from retainiq.explain import FIELDS, describe, explainer_for
+
+FIELD_ICONS = {'tenure':'🕐','MonthlyCharges':'💸','TotalCharges':'💰','Contract':'📋','PaymentMethod':'💳',
+               'PaperlessBilling':'🧾','TechSupport':'🔧','OnlineSecurity':'🔒','InternetService':'📡',
+               'SeniorCitizen':'👴','Partner':'🏠','Dependents':'🏠'}
 
 # ── Load Resources ─
-@st.cache_resource
-def load_model():
-    try:
-        with open("model.pkl","rb") as f: return pickle.load(f),None
-    except Exception as e: return None,str(e)
+# Keyed on the artifacts' mtime/size so a retrained model is picked up. model.riq
+# (python -m retainiq.modelfile export) is memory-mapped when present, which
+# skips unpickling and importing sklearn; otherwise the pickles are used.
+@st.cache_resource(max_entries=1)
+def load_model(fp):
+    try: return load_for_scoring(),None
+    except Exception as e: return (None,None),str(e)
+
+@st.cache_resource(max_entries=1)
+def load_encoder(_scaler,fp):
+    return FeatureEncoder(_scaler)
+
+# Static per model version; predictions only patch the gauge (see retainiq.charts).
+@st.cache_resource(max_entries=1)
+def load_importance_figure(_model,fp):
+    return importance_figure(_model.feature_importances_)
+
+# Per-leaf attribution table for the risk factor tags; None for non-tree models.
+@st.cache_resource(max_entries=1)
+def load_explainer(_model,fp):
+    return explainer_for(_model)
+
+# Precomputed cohort cube (python -m retainiq.cohorts build); slicing it never touches customer rows.
+@st.cache_resource(max_entries=1)
+def load_portfolio(fp):
+    if fp[0][1] is None: return None  # no cube on disk
+    from retainiq.cohorts import Cube  # imports pandas, so only once a cube exists
+    try: return Cube.load(PORTFOLIO_PATH)
+    except (OSError, ValueError): return None
 
 @st.cache_resource
-def load_scaler():
-    try:
-        with open("scaler.pkl","rb") as f: return pickle.load(f)
-    except: return None
+def load_prediction_cache():
+    return PredictionCache(maxsize=4096)
 
-model,model_error = load_model()
-scaler = load_scaler()
+# Sync the cache with the artifacts before the model is picked; see PredictionCache.generation.
+prediction_cache = load_prediction_cache()
+prediction_cache.check()
+cache_generation = prediction_cache.generation
+artifacts_fp = fingerprint()
+(model,scaler),model_error = load_model(artifacts_fp)
 if model_error:
     st.error(f"❌ Could not load model.pkl: {model_error}")
     st.stop()
+encoder = load_encoder(scaler,artifacts_fp)
 
 # ── Hero ──────────────────────────────────────────────────────────────────────
 st.markdown("""
@@ -176,49 +196,31 @@ with col_main:
     clicked = st.button("🔮  Run Churn Analysis",type="primary",use_container_width=True)
 
     if clicked:
+        import pandas as pd  # only needed once a prediction is rendered
+        from retainiq.whatif import contract_payment_matrix, single_offers, sweep
         input_data = {
-            'SeniorCitizen'    :1 if senior_citizen   =="Yes" else 0,
-            'Partner'          :1 if partner          =="Yes" else 0,
-            'Dependents'       :1 if dependents       =="Yes" else 0,
-            'PhoneService'     :1 if phone_service    =="Yes" else 0,
-            'MultipleLines'    :1 if multiple_lines   =="Yes" else 0,
-            'OnlineSecurity'   :1 if online_security  =="Yes" else 0,
-            'OnlineBackup'     :1 if online_backup    =="Yes" else 0,
-            'DeviceProtection' :1 if device_protection=="Yes" else 0,
-            'TechSupport'      :1 if tech_support     =="Yes" else 0,
-            'StreamingTV'      :1 if streaming_tv     =="Yes" else 0,
-            'StreamingMovies'  :1 if streaming_movies =="Yes" else 0,
-            'PaperlessBilling' :1 if paperless_billing=="Yes" else 0,
-            'tenure'           :float(tenure),
-            'MonthlyCharges'   :float(monthly_charges),
-            'TotalCharges'     :float(total_charges),
-            'gender_Male'                          :1 if gender          =="Male"                      else 0,
-            'InternetService_Fiber optic'          :1 if internet_service=="Fiber optic"               else 0,
-            'InternetService_No'                   :1 if internet_service=="No"                        else 0,
-            'Contract_One year'                    :1 if contract_type   =="One year"                  else 0,
-            'Contract_Two year'                    :1 if contract_type   =="Two year"                  else 0,
-            'PaymentMethod_Credit card (automatic)':1 if payment_method  =="Credit card (automatic)"   else 0,
-            'PaymentMethod_Electronic check'       :1 if payment_method  =="Electronic check"          else 0,
-            'PaymentMethod_Mailed check'           :1 if payment_method  =="Mailed check"              else 0,
+            'gender':gender, 'SeniorCitizen':senior_citizen, 'Partner':partner, 'Dependents':dependents,
+            'tenure':tenure, 'MonthlyCharges':monthly_charges, 'TotalCharges':total_charges,
+            'PhoneService':phone_service, 'MultipleLines':multiple_lines, 'InternetService':internet_service,
+            'OnlineSecurity':online_security, 'OnlineBackup':online_backup, 'DeviceProtection':device_protection,
+            'TechSupport':tech_support, 'StreamingTV':streaming_tv, 'StreamingMovies':streaming_movies,
+            'Contract':contract_type, 'PaperlessBilling':paperless_billing, 'PaymentMethod':payment_method,
         }
-        input_df = pd.DataFrame([input_data])[FEATURE_NAMES]
-        if scaler:
-            input_df[NUM_FEATURES] = scaler.transform(input_df[NUM_FEATURES])
-        else:
-            for feat,stats in SCALE_STATS.items():
-                input_df[feat]=(input_df[feat]-stats['mean'])/stats['std']
+        with METRICS.timer('encode'):
+            input_x = encoder.encode_record(input_data)
 
         try:
-            probability = model.predict_proba(input_df)[0][1]
-            prediction  = model.predict(input_df)[0]
+            with METRICS.timer('predict'):
+                probability = float(prediction_cache.predict_proba(model,input_x,cache_generation)[0])
+            prediction  = int(probability>0.5)
             pct         = round(probability*100,1)
 
-            if probability>=0.6:
+            if probability>=HIGH_RISK:
                 risk,rclass,vclass="HIGH","rc-high","v-high"
                 verdict="⚠️ HIGH CHURN RISK"
                 rec="Immediate intervention required — offer a retention discount, assign a dedicated account manager, and run an urgent satisfaction survey."
                 gc="#EF4444"; mc="m-high"
-            elif probability>=0.35:
+            elif probability>=MEDIUM_RISK:
                 risk,rclass,vclass="MEDIUM","rc-medium","v-medium"
                 verdict="📊 MEDIUM CHURN RISK"
                 rec="Proactive engagement recommended — schedule a check-in call, offer loyalty rewards, and review service quality."
@@ -229,6 +231,13 @@ with col_main:
                 rec="Customer is satisfied — maintain current service levels and explore upselling or cross-selling opportunities."
                 gc="#10B981"; mc="m-low"
 
+            # What-if: every retention offer for this customer, scored in one batched call
+            with METRICS.timer('whatif'):
+                offers = sweep(model,encoder,input_data)
+            best = single_offers(offers).iloc[0]
+            if risk!="LOW" and best['reduction']>=0.01:
+                rec += f" Best single offer: <b>{best['offer']}</b> (−{best['reduction']*100:.1f} pts)."
+
             # Verdict card
             st.markdown(f"""
             <div class="result-card {rclass}">
@@ -247,29 +256,11 @@ with col_main:
             """, unsafe_allow_html=True)
 
             # Gauge
-            fig = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=pct,
-                number={'suffix':'%','font':{'size':44,'color':'#F9FAFB','family':'Syne'}},
-                domain={'x':[0,1],'y':[0,1]},
-                gauge={
-                    'axis':{'range':[0,100],'tickcolor':'#374151','tickfont':{'color':'#374151','size':10}},
-                    'bar' :{'color':gc,'thickness':0.22},
-                    'bgcolor':'#0D1424','bordercolor':'#1F2937',
-                    'steps':[
-                        {'range':[0,35],  'color':'rgba(16,185,129,0.08)'},
-                        {'range':[35,60], 'color':'rgba(245,158,11,0.08)'},
-                        {'range':[60,100],'color':'rgba(239,68,68,0.08)'}
-                    ],
-                    'threshold':{'line':{'color':gc,'width':3},'thickness':0.85,'value':pct}
-                }
-            ))
-            fig.update_layout(
-                height=260,margin=dict(t=15,b=15,l=25,r=25),
-                paper_bgcolor='rgba(0,0,0,0)',plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(family='DM Sans')
-            )
-            st.plotly_chart(fig,use_container_width=True)
+            with METRICS.timer('render_gauge'):
+                if 'gauge_fig' not in st.session_state:
+                    st.session_state.gauge_fig = gauge_figure()
+                fig = patch_gauge(st.session_state.gauge_fig,pct,gc)
+            st.plotly_chart(fig,use_container_width=True,theme=None)
 
             # Metric tiles
             st.markdown(f"""
@@ -291,42 +282,23 @@ with col_main:
 
             # Feature importance chart
             if hasattr(model,'feature_importances_'):
-                imp_df = pd.DataFrame({'Feature':FEATURE_NAMES,'Importance':model.feature_importances_}).sort_values('Importance',ascending=True).tail(10)
-                fig2 = go.Figure(go.Bar(
-                    x=imp_df['Importance'], y=imp_df['Feature'], orientation='h',
-                    marker=dict(color=imp_df['Importance'],colorscale=[[0,'#1D4ED8'],[0.5,'#7C3AED'],[1,'#06B6D4']],showscale=False),
-                    text=[f"{v:.3f}" for v in imp_df['Importance']],
-                    textposition='outside',textfont=dict(color='#6B7280',size=10)
-                ))
-                fig2.update_layout(
-                    title=dict(text='Top 10 Churn Drivers',font=dict(family='Syne',size=13,color='#F9FAFB')),
-                    height=360,margin=dict(t=40,b=10,l=10,r=80),
-                    paper_bgcolor='rgba(0,0,0,0)',plot_bgcolor='rgba(0,0,0,0)',
-                    xaxis=dict(showgrid=False,showticklabels=False),
-                    yaxis=dict(tickfont=dict(size=10,color='#9CA3AF')),
-                    font=dict(family='DM Sans')
-                )
+                with METRICS.timer('render_importance'):
+                    fig2 = load_importance_figure(model,artifacts_fp)
                 with st.expander("📊 Feature Importance Analysis"):
-                    st.plotly_chart(fig2,use_container_width=True)
+                    st.plotly_chart(fig2,use_container_width=True,theme=None)
 
-            # Risk factor tags
+            # Risk factor tags: this customer's largest contributions, from the forest's own paths
             hi,me,go_list=[],[],[]
-            if tenure<6:                         hi.append("🕐 Very short tenure")
-            elif tenure<12:                      me.append("🕐 Short tenure")
-            if monthly_charges>80:               hi.append("💸 High charges")
-            elif monthly_charges>60:             me.append("💰 Moderate charges")
-            if contract_type=="Month-to-month":  hi.append("📋 Month-to-month")
-            if payment_method=="Electronic check":hi.append("💳 Electronic check")
-            if tech_support=="No" and internet_service!="No": hi.append("🔧 No tech support")
-            if internet_service=="Fiber optic":  me.append("📡 Fiber optic")
-            if online_security=="No" and internet_service!="No": me.append("🔓 No security")
-            if senior_citizen=="Yes":            me.append("👴 Senior citizen")
-            if partner=="No" and dependents=="No":me.append("🏠 Single household")
-            if contract_type=="Two year":        go_list.append("📋 Two-year contract")
-            if tenure>36:                        go_list.append("⭐ Loyal customer")
-            if tech_support=="Yes":              go_list.append("🔧 Tech support active")
-            if payment_method in ["Bank transfer (automatic)","Credit card (automatic)"]: go_list.append("💳 Auto payment")
-            if online_security=="Yes":           go_list.append("🔒 Security active")
+            explainer = load_explainer(model,artifacts_fp)
+            if explainer is not None:
+                with METRICS.timer('explain'):
+                    contrib = explainer.field_contributions(input_x)[0]
+                for j in np.argsort(-np.abs(contrib)):
+                    c,field = contrib[j],FIELDS[j]
+                    tag = f"{FIELD_ICONS.get(field,'🔹')} {describe(field,input_data[field])} · {c*100:+.1f} pts"
+                    if c>=0.05 and len(hi)<4:            hi.append(tag)
+                    elif 0.01<=c<0.05 and len(me)<4:     me.append(tag)
+                    elif c<=-0.01 and len(go_list)<4:    go_list.append(tag)
 
             st.markdown('<div class="factors-title">Risk Factor Analysis</div>', unsafe_allow_html=True)
             tags = '<div class="f-wrap">'
@@ -334,12 +306,34 @@ with col_main:
             for f in me:       tags+=f'<span class="f-tag t-med">{f}</span>'
             for f in go_list:  tags+=f'<span class="f-tag t-good">{f}</span>'
             if not hi+me+go_list: tags+='<span style="color:#4B5563;font-size:0.85rem">No significant factors identified</span>'
+            if explainer is None: tags='<div class="f-wrap"><span style="color:#4B5563;font-size:0.85rem">Per-customer drivers need a tree-based model</span>'
             tags+='</div>'
             st.markdown(tags, unsafe_allow_html=True)
 
+            # What-if table and heatmap
+            with st.expander("🧪 What-if: Retention Offers"):
+                view = lambda df: pd.DataFrame({'Offer':df['offer'],'Churn %':(df['churn_probability']*100).round(1),
+                                                'Reduction (pts)':(df['reduction']*100).round(1),'Risk':df['risk_band']})
+                st.dataframe(view(single_offers(offers)),use_container_width=True,hide_index=True)
+                st.plotly_chart(whatif_heatmap(contract_payment_matrix(offers)),use_container_width=True,theme=None)
+                st.markdown(f"Best bundles of {len(offers):,} variants")
+                st.dataframe(view(offers.head(10)),use_container_width=True,hide_index=True)
+
             # Debug
             with st.expander("🔍 Debug: Model Input"):
-                st.dataframe(input_df,use_container_width=True)
+                st.dataframe(pd.DataFrame(input_x,columns=FEATURE_NAMES),use_container_width=True)
+
+            # Diagnostics (RETAINIQ_METRICS=1)
+            if METRICS.enabled:
+                METRICS.count('predictions')
+                diag = METRICS.snapshot()
+                diag['prediction_cache'] = prediction_cache.stats()
+                with st.expander("⏱️ Diagnostics"):
+                    st.dataframe(pd.DataFrame([{'stage':k,**{m:v[m] for m in ('count','mean_ms','p50_ms','p95_ms','p99_ms')}}
+                                               for k,v in diag['stages'].items()]),use_container_width=True)
+                    st.json({'counters':diag['counters'],'prediction_cache':diag['prediction_cache']})
+                    st.download_button("Download metrics JSON",json.dumps(diag,indent=2),"retainiq-metrics.json","application/json")
+                METRICS.dump(extra={'prediction_cache':diag['prediction_cache']})
 
         except Exception as e:
             st.error(f"❌ Prediction error: {e}")
@@ -391,13 +385,41 @@ with col_info:
     <div class="i-card">
         <div class="i-title">🤖 Model</div>
         <div style="font-size:0.82rem;line-height:2;color:#6B7280!important">
-            Type: <span style="color:#93C5FD!important">{type(model).__name__}</span><br>
+            Type: <span style="color:#93C5FD!important">{getattr(model,'model_type',type(model).__name__)}</span><br>
             Features: <span style="color:#93C5FD!important">{len(FEATURE_NAMES)}</span><br>
             Scaler: <span style="color:{'#6EE7B7' if scaler else '#FCA5A5'}!important">{'✅ Loaded' if scaler else '⚠️ Approx'}</span>
         </div>
     </div>
     """, unsafe_allow_html=True)
 
+# ── Portfolio View ────────────────────────────────────────────────────────────
+portfolio = load_portfolio(fingerprint(PORTFOLIO_PATH))
+if portfolio is not None:
+    from retainiq.cohorts import DIMENSIONS
+    with st.expander(f"📈 Portfolio View · {portfolio.customers:,} scored customers"):
+        dims = list(DIMENSIONS)
+        group_by = st.selectbox("Group by",dims,index=dims.index('Contract'))
+        fcols = [c for _ in range(0,len(dims),5) for c in st.columns(5)]
+        filters = {d:sel for d,c in zip(dims,fcols) if (sel:=c.multiselect(d,DIMENSIONS[d]))}
+        with METRICS.timer('portfolio_slice'):
+            total = portfolio.group((),**filters)
+            table = portfolio.group([group_by],**filters)
+        if total.empty:
+            st.info("No customers in this slice.")
+        else:
+            t = total.iloc[0]
+            st.markdown(f"""
+            <div class="m-grid">
+                <div class="m-tile"><div class="m-lbl">Customers</div><div class="m-val">{t['customers']:,}</div></div>
+                <div class="m-tile"><div class="m-lbl">Mean Churn Risk</div><div class="m-val m-medium">{t['churn_rate']*100:.1f}%</div></div>
+                <div class="m-tile"><div class="m-lbl">Revenue at Risk</div><div class="m-val m-high">${t['revenue_at_risk']:,.0f}<span style="font-size:1rem;color:#6B7280"> /mo</span></div></div>
+            </div>
+            """, unsafe_allow_html=True)
+            st.plotly_chart(portfolio_figure(table,f"Monthly Revenue at Risk by {group_by}"),use_container_width=True,theme=None)
+            st.dataframe(table.reset_index().assign(churn_rate=lambda d:(d.churn_rate*100).round(1),
+                                                    risk_share=lambda d:(d.risk_share*100).round(1)),
+                         use_container_width=True,hide_index=True)
+
 # ── Footer ────────────────────────────────────────────────────────────────────
 st.markdown("""
 <div class="page-footer">
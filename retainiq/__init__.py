@@ -0,0 +1 @@
+"""RetainIQ scoring library: the code the Streamlit app and offline tools share."""
@@ -0,0 +1,83 @@
+"""Loading of the trained model and scaler artifacts."""
+import hashlib
+import os
+import pickle
+import warnings
+
+from .metrics import METRICS
+
+MODEL_PATH     = "model.pkl"
+SCALER_PATH    = "scaler.pkl"
+MODELFILE_PATH = "model.riq"
+PORTFOLIO_PATH = "portfolio.npz"
+
+
+def load_model(path=MODEL_PATH):
+    METRICS.count('model_loads')
+    with METRICS.timer('load_model'), open(path,"rb") as f: return pickle.load(f)
+
+
+def load_scaler(path=SCALER_PATH):
+    """Return the fitted scaler, or None so callers fall back to SCALE_STATS."""
+    METRICS.count('scaler_loads')
+    try:
+        with METRICS.timer('load_scaler'), open(path,"rb") as f: return pickle.load(f)
+    except (OSError, pickle.UnpicklingError): return None
+
+
+def load_for_scoring(model_path=MODEL_PATH, scaler_path=SCALER_PATH, modelfile_path=MODELFILE_PATH):
+    """(model, scaler) ready for scoring.
+
+    Uses the memory-mapped model file when it exists and is at least as new as
+    the pickle, which skips unpickling and importing sklearn; otherwise falls
+    back to the pickles with the forest compiled in memory. The model file also
+    carries the scaler statistics, so it is skipped (with a warning) when
+    ``scaler.pkl`` no longer matches the one it was exported from.
+    """
+    from .forest import compile_model
+    from .modelfile import load
+    try:
+        fresh = os.path.getmtime(modelfile_path) >= os.path.getmtime(model_path)
+    except OSError:
+        fresh = os.path.exists(modelfile_path)
+    if fresh:
+        METRICS.count('modelfile_loads')
+        with METRICS.timer('load_modelfile'):
+            mf = load(modelfile_path)
+        if _same_scaler(mf, modelfile_path, scaler_path):
+            return mf.forest, mf.scaler
+        METRICS.count('modelfile_stale')
+        warnings.warn(f"{scaler_path} changed after {modelfile_path} was exported; scoring from the pickles "
+                      f"(re-run python -m retainiq.modelfile export)")
+    return compile_model(load_model(model_path)), load_scaler(scaler_path)
+
+
+def _same_scaler(mf, modelfile_path, scaler_path):
+    """Whether ``scaler_path`` is the scaler ``mf`` was exported with (by hash, else by mtime)."""
+    if not os.path.exists(scaler_path):
+        return True
+    expected = mf.header.get('source', {}).get('scaler_sha256')
+    if expected:
+        return file_sha256(scaler_path) == expected
+    return os.path.getmtime(modelfile_path) >= os.path.getmtime(scaler_path)
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's contents, read in 1 MB blocks."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fingerprint(*paths):
+    """(path, mtime_ns, size) per artifact; changes whenever a file is rewritten."""
+    out = []
+    for path in paths or (MODEL_PATH, SCALER_PATH, MODELFILE_PATH):
+        try:
+            st = os.stat(path)
+            out.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            out.append((path, None, None))
+    return tuple(out)
@@ -0,0 +1,195 @@
+"""Batch scoring of a customer file.
+
+Reads raw Telco-style columns from CSV or Parquet in bounded chunks, encodes
+each chunk into the ``FEATURE_NAMES`` layout, scores it and appends churn
+probability, risk band and prediction to the output file. Memory stays flat
+regardless of input size because only one chunk is held at a time. With
+``--explain N`` each row also gets its N largest drivers from
+``retainiq.explain``.
+
+    python -m retainiq.batch customers.csv scores.csv --chunk-size 100000
+    python -m retainiq.batch customers.csv scores.csv --explain 3
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .artifacts import MODEL_PATH, MODELFILE_PATH, SCALER_PATH, load_for_scoring, load_model, load_scaler
+from .cache import PredictionCache
+from .config import FEATURE_NAMES, ID_COLUMN, RAW_COLUMNS, risk_band
+from .encoding import DTYPE, FeatureEncoder
+from .explain import FIELDS, describe, explainer_for
+from .inference import predict_proba
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+# ── Scoring ───────────────────────────────────────────────────────────────────
+def score_frame(model, encoder, df, out=None, cache=None, explainer=None, drivers=3):
+    """Score one chunk of raw rows; returns the output columns for that chunk.
+
+    With an ``explainer`` the chunk also gets ``driver_1..N`` labels and their
+    ``driver_i_impact`` (signed change in churn probability).
+    """
+    X = encoder.encode_columns(df, out)
+    proba = cache.predict_proba(model, X) if cache else predict_proba(model, X)
+    result = pd.DataFrame(index=df.index)
+    if ID_COLUMN in df.columns:
+        result[ID_COLUMN] = df[ID_COLUMN].values
+    result['churn_probability'] = proba
+    result['risk_band'] = risk_band(proba)
+    # Same decision rule as model.predict for a binary forest, without a second pass.
+    result['prediction'] = (proba > 0.5).astype(np.int8)
+    if explainer is not None:
+        contrib = explainer.field_contributions(X)
+        top = np.argsort(-np.abs(contrib), axis=1)[:, :drivers]
+        raw = {f:df[f].tolist() for f in FIELDS}
+        rows = np.arange(len(df))
+        for k in range(top.shape[1]):
+            result[f'driver_{k+1}'] = [describe(FIELDS[j], raw[FIELDS[j]][i]) for i, j in enumerate(top[:, k])]
+            result[f'driver_{k+1}_impact'] = contrib[rows, top[:, k]].round(4)
+    return result
+
+
+# ── File I/O ──────────────────────────────────────────────────────────────────
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in ('.parquet','.pq')
+
+
+def _usecols(path):
+    """Raw columns plus the id column if the file carries one."""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        names = pq.ParquetFile(path).schema_arrow.names
+    else:
+        names = pd.read_csv(path, nrows=0).columns.tolist()
+    return [c for c in names if c in RAW_COLUMNS or c == ID_COLUMN]
+
+
+def iter_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most ``chunk_size`` rows from a CSV or Parquet file."""
+    columns = _usecols(path)
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        # TotalCharges has blank strings in the raw Telco export; parse them as NaN.
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size,
+                               dtype={ID_COLUMN:str}, na_values={'TotalCharges':[' ']})
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet = _is_parquet(path)
+        self._writer = None
+        self._header = True
+
+    def write(self, df):
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+
+def score_file(input_path, output_path, model, scaler=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, cache=None,
+               explain=0, strict=False):
+    """Stream ``input_path`` through the model into ``output_path``.
+
+    Returns a dict with ``rows``, ``seconds``, ``rows_per_sec``, ``unknown_rows``
+    and ``unknown`` (per-column count of category values outside
+    ``CATEGORY_LEVELS``, which score as the baseline level). ``strict`` raises
+    on the first chunk with such values instead. ``progress`` is called with the
+    running row count after each chunk. ``explain`` adds that many top-driver
+    columns (tree ensembles only).
+    """
+    encoder = FeatureEncoder(scaler)
+    explainer = explainer_for(model) if explain else None
+    if explain and explainer is None:
+        raise ValueError(f"--explain needs a tree ensemble, got {type(model).__name__}")
+    buffer = np.empty((chunk_size,len(FEATURE_NAMES)), dtype=DTYPE)
+    rows = 0
+    start = time.perf_counter()
+    with ChunkWriter(output_path) as writer:
+        for chunk in iter_chunks(input_path, chunk_size):
+            scored = score_frame(model, encoder, chunk, buffer[:len(chunk)], cache, explainer, explain)
+            if strict and encoder.unknown_rows:
+                raise ValueError(f"rows {rows:,}-{rows+len(chunk)-1:,} have unknown category levels: "
+                                 f"{_unknown_summary(encoder.unknown)}")
+            writer.write(scored)
+            rows += len(chunk)
+            if progress: progress(rows)
+    seconds = time.perf_counter() - start
+    return {'rows':rows, 'seconds':seconds, 'rows_per_sec':rows/seconds if seconds else 0.0,
+            'unknown_rows':encoder.unknown_rows, 'unknown':dict(encoder.unknown)}
+
+
+def _unknown_summary(unknown):
+    return ', '.join(f"{col} x{n:,}" for col, n in unknown.items() if n)
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+def build_parser():
+    p = argparse.ArgumentParser(prog='python -m retainiq.batch', description='Score a customer file for churn risk.')
+    p.add_argument('input', help='CSV or Parquet file with raw Telco columns')
+    p.add_argument('output', help='CSV or Parquet file to write scores to')
+    p.add_argument('--model', default=MODEL_PATH)
+    p.add_argument('--scaler', default=SCALER_PATH)
+    p.add_argument('--modelfile', default=MODELFILE_PATH, help='memory-mapped model file for --backend compiled')
+    p.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    # sklearn's Cython traversal wins on large chunks; the flattened forest wins on small ones.
+    p.add_argument('--backend', choices=['sklearn','compiled'], default='sklearn')
+    p.add_argument('--cache-size', type=int, default=0, help='memoise up to N distinct encoded rows (0 disables)')
+    p.add_argument('--explain', type=int, default=0, metavar='N', help='add the N largest per-customer drivers (0 disables)')
+    p.add_argument('--strict', action='store_true', help='fail on category values outside the known levels')
+    p.add_argument('--quiet', action='store_true', help='no per-chunk progress')
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.backend == 'compiled':
+        model, scaler = load_for_scoring(args.model, args.scaler, args.modelfile)
+    else:
+        model, scaler = load_model(args.model), load_scaler(args.scaler)
+    if scaler is None:
+        print(f"warning: {args.scaler} not loaded, using approximate SCALE_STATS", file=sys.stderr)
+    progress = None if args.quiet else (lambda n: print(f"  {n:,} rows", file=sys.stderr))
+    cache = PredictionCache(args.cache_size, (args.model, args.scaler, args.modelfile)) if args.cache_size else None
+    try:
+        stats = score_file(args.input, args.output, model, scaler, args.chunk_size, progress, cache, args.explain,
+                           args.strict)
+    except ValueError as e:
+        sys.exit(f"error: {e}")
+    print(f"scored {stats['rows']:,} rows in {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)", file=sys.stderr)
+    if stats['unknown_rows']:
+        print(f"warning: {stats['unknown_rows']:,} rows have unknown category levels, scored as the baseline level "
+              f"({_unknown_summary(stats['unknown'])})", file=sys.stderr)
+    if cache is not None:
+        c = cache.stats()
+        print(f"cache: {c['hits']:,} hits, {c['misses']:,} misses ({c['hit_rate']:.1%})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
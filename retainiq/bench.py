@@ -0,0 +1,258 @@
+"""Benchmark suite for the encode -> scale -> predict -> render pipeline.
+
+Times each stage of the dashboard's hot path separately on synthetic Telco
+customers, without a browser: the DataFrame construction and
+``scaler.transform`` the app used to do, the shared ``FeatureEncoder``, the
+sklearn and compiled forest calls, per-customer attributions, the ``feature_importances_`` sort and the
+two plotly figures, both as the app used to build them per click and as the
+cached/patched figures from ``retainiq.charts``. Each stage runs at every
+requested batch size and records latency percentiles, throughput and peak
+traced memory. The legacy ``dataframe_build`` stage builds one dict per row,
+so it stops at ``LEGACY_MAX_ROWS``. Results are written as JSON so runs can be
+compared.
+
+    python -m retainiq.bench run --sizes 1,100,10000,1000000 -o bench.json
+    python -m retainiq.bench compare baseline.json bench.json --tolerance 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+
+from . import charts
+from .artifacts import MODEL_PATH, SCALER_PATH, load_model, load_scaler
+from .config import FEATURE_NAMES, NUM_FEATURES, RAW_COLUMNS
+from .encoding import FeatureEncoder, _legacy_app_row
+from .explain import TreeExplainer
+from .forest import compile_model
+from .inference import predict_proba
+from .synthetic import generate_customers
+
+DEFAULT_SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+# Stages that render one customer; they do not depend on batch size.
+RENDER_STAGES = {'importance_sort', 'gauge_figure', 'importance_figure', 'gauge_patch', 'importance_cached'}
+# Stages whose setup holds one Python dict per row (~5 KB each); larger sizes are skipped.
+LEGACY_STAGES = {'dataframe_build'}
+LEGACY_MAX_ROWS = 100_000
+
+
+# ── Stages ────────────────────────────────────────────────────────────────────
+def build_stages(model, scaler):
+    """name -> (setup(cols) -> state, run(state)); setup work is not timed."""
+    import pandas as pd
+    encoder = FeatureEncoder(scaler)
+    compiled = compile_model(model) if model is not None else None
+
+    def legacy_rows(cols):
+        n = len(cols['tenure'])
+        lists = {c:cols[c].tolist() for c in RAW_COLUMNS}
+        return [_legacy_app_row({c:lists[c][i] for c in RAW_COLUMNS}) for i in range(n)]
+
+    def encoded(cols):
+        return encoder.encode_columns(cols)
+
+    stages = {
+        'dataframe_build':(legacy_rows, lambda rows: pd.DataFrame(rows)[FEATURE_NAMES]),
+        'encoder':(lambda cols: cols, encoder.encode_columns),
+    }
+    if scaler is not None:
+        # Built column-wise: only the numeric columns reach the scaler.
+        stages['scaler_transform'] = (lambda cols: pd.DataFrame({c:cols[c] for c in NUM_FEATURES}),
+                                      lambda df: scaler.transform(df[NUM_FEATURES]))
+    if model is not None:
+        def sk_frame(cols):
+            return pd.DataFrame(encoded(cols), columns=FEATURE_NAMES)
+        stages['sklearn_predict_proba'] = (sk_frame, lambda df: model.predict_proba(df))
+        stages['sklearn_predict'] = (sk_frame, lambda df: model.predict(df))
+        if compiled is not model:
+            stages['compiled_predict'] = (encoded, compiled.predict_with_proba)
+            explainer = TreeExplainer(compiled)
+            stages['explain'] = (encoded, explainer.field_contributions)
+        if hasattr(model, 'feature_importances_'):
+            stages['importance_sort'] = (lambda cols: None, lambda _: pd.DataFrame(
+                {'Feature':FEATURE_NAMES,'Importance':model.feature_importances_}
+            ).sort_values('Importance',ascending=True).tail(10))
+            stages['importance_figure'] = (lambda cols: None, lambda _: _importance_figure(model).to_json())
+            # What the dashboard does now: reuse the per-model figure as-is.
+            stages['importance_cached'] = (lambda cols: charts.importance_figure(model.feature_importances_),
+                                           lambda fig: fig.to_json())
+        pct_of = lambda cols: float(predict_proba(model, encoded(cols)[:1])[0]) * 100
+        stages['gauge_figure'] = (pct_of, lambda pct: _gauge_figure(pct).to_json())
+        stages['gauge_patch'] = (lambda cols: (charts.gauge_figure(), pct_of(cols)),
+                                 lambda state: charts.patch_gauge(state[0], state[1], '#EF4444').to_json())
+    return stages
+
+
+# The figures exactly as app.py built them on every click before retainiq.charts.
+def _gauge_figure(pct):
+    import plotly.graph_objects as go
+    gc = '#EF4444' if pct >= 60 else '#F59E0B' if pct >= 35 else '#10B981'
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=pct,
+        number={'suffix':'%','font':{'size':44,'color':'#F9FAFB','family':'Syne'}},
+        domain={'x':[0,1],'y':[0,1]},
+        gauge={
+            'axis':{'range':[0,100],'tickcolor':'#374151','tickfont':{'color':'#374151','size':10}},
+            'bar' :{'color':gc,'thickness':0.22},
+            'bgcolor':'#0D1424','bordercolor':'#1F2937',
+            'steps':[
+                {'range':[0,35],  'color':'rgba(16,185,129,0.08)'},
+                {'range':[35,60], 'color':'rgba(245,158,11,0.08)'},
+                {'range':[60,100],'color':'rgba(239,68,68,0.08)'}
+            ],
+            'threshold':{'line':{'color':gc,'width':3},'thickness':0.85,'value':pct}
+        }
+    ))
+    fig.update_layout(
+        height=260,margin=dict(t=15,b=15,l=25,r=25),
+        paper_bgcolor='rgba(0,0,0,0)',plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='DM Sans')
+    )
+    return fig
+
+
+def _importance_figure(model):
+    import pandas as pd
+    import plotly.graph_objects as go
+    imp_df = pd.DataFrame({'Feature':FEATURE_NAMES,'Importance':model.feature_importances_}).sort_values('Importance',ascending=True).tail(10)
+    fig2 = go.Figure(go.Bar(
+        x=imp_df['Importance'], y=imp_df['Feature'], orientation='h',
+        marker=dict(color=imp_df['Importance'],colorscale=[[0,'#1D4ED8'],[0.5,'#7C3AED'],[1,'#06B6D4']],showscale=False),
+        text=[f"{v:.3f}" for v in imp_df['Importance']],
+        textposition='outside',textfont=dict(color='#6B7280',size=10)
+    ))
+    fig2.update_layout(
+        title=dict(text='Top 10 Churn Drivers',font=dict(family='Syne',size=13,color='#F9FAFB')),
+        height=360,margin=dict(t=40,b=10,l=10,r=80),
+        paper_bgcolor='rgba(0,0,0,0)',plot_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(showgrid=False,showticklabels=False),
+        yaxis=dict(tickfont=dict(size=10,color='#9CA3AF')),
+        font=dict(family='DM Sans')
+    )
+    return fig2
+
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+def measure(run, state, size, min_time=0.5, max_repeats=200):
+    """Time ``run(state)`` until ``min_time`` has elapsed; one extra traced run gives peak memory.
+
+    Stages that return a string (serialised figures) also report its size.
+    """
+    out = run(state)   # warm-up
+    times = []
+    total = 0.0
+    while len(times) < max_repeats and (total < min_time or len(times) < 3):
+        t = time.perf_counter(); run(state); dt = time.perf_counter() - t
+        times.append(dt); total += dt
+        if dt > min_time: break
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ms = np.array(times) * 1e3
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {'size':size, 'repeats':len(times), 'mean_ms':float(ms.mean()),
+            'p50_ms':float(p50), 'p95_ms':float(p95), 'p99_ms':float(p99),
+            'rows_per_sec':size / (p50 / 1e3) if p50 else 0.0, 'peak_mb':peak / 1024**2,
+            'payload_bytes':len(out) if isinstance(out, str) else None}
+
+
+def run_suite(sizes=DEFAULT_SIZES, model_path=MODEL_PATH, scaler_path=SCALER_PATH, stages=None,
+              min_time=0.5, seed=0, log=None):
+    model = load_model(model_path) if os.path.exists(model_path) else None
+    scaler = load_scaler(scaler_path)
+    all_stages = build_stages(model, scaler)
+    names = [s for s in (stages or all_stages) if s in all_stages]
+    results = []
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        for size in sizes:
+            cols = generate_customers(size, seed, with_id=False)
+            for name in names:
+                if name in RENDER_STAGES and size != sizes[0]:
+                    continue
+                if name in LEGACY_STAGES and size > LEGACY_MAX_ROWS:
+                    continue
+                setup, run = all_stages[name]
+                r = {'stage':name, **measure(run, setup(cols), size, min_time)}
+                results.append(r)
+                if log: log(r)
+    return {'meta':_meta(model, model_path, sizes), 'results':results}
+
+
+def _meta(model, model_path, sizes):
+    import sklearn
+    return {
+        'timestamp':time.strftime('%Y-%m-%dT%H:%M:%S'), 'python':platform.python_version(),
+        'numpy':np.__version__, 'sklearn':sklearn.__version__, 'platform':platform.platform(),
+        'cpu_count':os.cpu_count(), 'sizes':list(sizes),
+        'model':{'path':model_path, 'type':type(model).__name__ if model is not None else None,
+                 'n_estimators':len(getattr(model, 'estimators_', []))},
+    }
+
+
+def compare(baseline, current, tolerance=0.10):
+    """Rows comparing p50 latency per (stage, size); a ratio above 1+tolerance is a regression."""
+    base = {(r['stage'], r['size']):r for r in baseline['results']}
+    rows = []
+    for r in current['results']:
+        b = base.get((r['stage'], r['size']))
+        if b is None or not b['p50_ms']:
+            continue
+        ratio = r['p50_ms'] / b['p50_ms']
+        rows.append({'stage':r['stage'], 'size':r['size'], 'baseline_ms':b['p50_ms'],
+                     'current_ms':r['p50_ms'], 'ratio':ratio, 'regression':ratio > 1 + tolerance})
+    return rows
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+def _fmt(r):
+    return (f"{r['stage']:<22} {r['size']:>9,} {r['p50_ms']:>10.3f} {r['p99_ms']:>10.3f} "
+            f"{r['rows_per_sec']:>13,.0f} {r['peak_mb']:>8.1f}")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='python -m retainiq.bench', description='Benchmark the scoring pipeline.')
+    sub = p.add_subparsers(dest='cmd', required=True)
+    r = sub.add_parser('run')
+    r.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)))
+    r.add_argument('--stages', help='comma-separated subset of stages')
+    r.add_argument('--model', default=MODEL_PATH)
+    r.add_argument('--scaler', default=SCALER_PATH)
+    r.add_argument('--min-time', type=float, default=0.5, help='seconds of timing per stage and size')
+    r.add_argument('-o', '--output', help='write JSON results here')
+    c = sub.add_parser('compare')
+    c.add_argument('baseline')
+    c.add_argument('current')
+    c.add_argument('--tolerance', type=float, default=0.10, help='allowed p50 slow-down before flagging')
+    args = p.parse_args(argv)
+
+    if args.cmd == 'run':
+        print(f"{'stage':<22} {'rows':>9} {'p50 ms':>10} {'p99 ms':>10} {'rows/sec':>13} {'peak MB':>8}")
+        report = run_suite([int(s) for s in args.sizes.split(',')], args.model, args.scaler,
+                           args.stages.split(',') if args.stages else None, args.min_time,
+                           log=lambda r: print(_fmt(r), flush=True))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f: baseline = json.load(f)
+    with open(args.current) as f: current = json.load(f)
+    rows = compare(baseline, current, args.tolerance)
+    print(f"{'stage':<22} {'rows':>9} {'base ms':>10} {'now ms':>10} {'ratio':>7}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['stage']:<22} {row['size']:>9,} {row['baseline_ms']:>10.3f} {row['current_ms']:>10.3f} {row['ratio']:>7.2f}{flag}")
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Memoised churn predictions keyed on the encoded feature vector.
+
+The key is the raw bytes of the scaled float32 row in ``FEATURE_NAMES``
+order, so two inputs that encode identically share one entry. The cache
+watches the model, scaler and model-file artifacts and empties itself when any
+of them is rewritten, since each changes what a key maps to. Each emptying
+starts a new ``generation``; results computed under an older one are returned
+but never stored, so a request already scoring with the previous model cannot
+refill the cache with stale probabilities.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .artifacts import MODEL_PATH, MODELFILE_PATH, SCALER_PATH, fingerprint
+from .inference import predict_proba
+
+
+class PredictionCache:
+    """Bounded LRU of churn probabilities with hit/miss statistics."""
+
+    def __init__(self, maxsize=10_000, paths=(MODEL_PATH, SCALER_PATH, MODELFILE_PATH), on_invalidate=None):
+        self.maxsize = maxsize
+        self.paths = tuple(paths)
+        self.on_invalidate = on_invalidate   # called when the artifacts changed on disk, before clearing
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = fingerprint(*self.paths)
+        self.generation = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def check(self):
+        """Clear the cache if the watched artifacts changed; returns True if it did.
+
+        ``on_invalidate`` runs before the new generation starts, so a caller
+        that reads ``generation`` and then its model never pairs the new
+        generation with the old model.
+        """
+        current = fingerprint(*self.paths)
+        if current == self._fingerprint:
+            return False
+        if self.on_invalidate:
+            self.on_invalidate()
+        with self._lock:
+            self._data.clear()
+            self._fingerprint = current
+            self.generation += 1
+            self.invalidations += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def predict_proba(self, model, X, generation=None):
+        """Churn probability per row of ``X``, calling ``model`` once for all misses.
+
+        ``generation`` is the value read before ``model`` was chosen; misses are
+        only stored while it is still current. Without it the cache checks the
+        artifacts itself and assumes ``model`` is current.
+        """
+        if generation is None:
+            self.check()
+            generation = self.generation
+        X = np.ascontiguousarray(X)
+        keys = [row.tobytes() for row in X]
+        out = np.empty(len(X))
+        miss = []
+        with self._lock:
+            for i,key in enumerate(keys):
+                value = self._data.get(key)
+                if value is None:
+                    miss.append(i)
+                else:
+                    self._data.move_to_end(key)
+                    out[i] = value
+            self.hits += len(X) - len(miss)
+            self.misses += len(miss)
+        if miss:
+            out[miss] = predict_proba(model, X[miss])
+            with self._lock:
+                if generation != self.generation:
+                    return out
+                for i in miss:
+                    self._data[keys[i]] = out[i]
+                    self._data.move_to_end(keys[i])
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+        return out
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size':len(self._data), 'maxsize':self.maxsize,
+            'hits':self.hits, 'misses':self.misses,
+            'hit_rate':round(self.hits/lookups, 4) if lookups else 0.0,
+            'evictions':self.evictions, 'invalidations':self.invalidations,
+        }
@@ -0,0 +1,128 @@
+"""Dashboard figures built once per model and patched per prediction.
+
+The importance chart depends only on the loaded model, so it is built once
+per model version and reused as-is. The gauge is built once per session from
+a template and each prediction only sets its value and colours. Both use an
+empty plotly template: every colour and font the dashboard relies on is set
+explicitly, and dropping the default template removes most of the JSON sent
+to the browser per chart. The what-if heatmap and portfolio bars are small
+and built per view.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+from .config import FEATURE_NAMES, HIGH_RISK, MEDIUM_RISK
+
+TOP_N = 10
+_EMPTY_TEMPLATE = go.layout.Template()
+
+
+def top_importances(importances, n=TOP_N):
+    """(names, values) of the ``n`` most important features, ascending for a horizontal bar chart."""
+    importances = np.asarray(importances)
+    order = np.argsort(importances, kind='stable')[-n:]
+    return [FEATURE_NAMES[i] for i in order], importances[order]
+
+
+def importance_figure(importances, n=TOP_N):
+    names, values = top_importances(importances, n)
+    fig = go.Figure(go.Bar(
+        x=values, y=names, orientation='h',
+        marker=dict(color=values,colorscale=[[0,'#1D4ED8'],[0.5,'#7C3AED'],[1,'#06B6D4']],showscale=False),
+        text=[f"{v:.3f}" for v in values],
+        textposition='outside',textfont=dict(color='#6B7280',size=10)
+    ))
+    fig.update_layout(
+        template=_EMPTY_TEMPLATE,
+        title=dict(text=f'Top {n} Churn Drivers',font=dict(family='Syne',size=13,color='#F9FAFB')),
+        height=360,margin=dict(t=40,b=10,l=10,r=80),
+        paper_bgcolor='rgba(0,0,0,0)',plot_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(showgrid=False,showticklabels=False,zeroline=False),
+        yaxis=dict(tickfont=dict(size=10,color='#9CA3AF')),
+        font=dict(family='DM Sans')
+    )
+    return fig
+
+
+def gauge_figure():
+    """Churn gauge with placeholder value; fill it in with ``patch_gauge``."""
+    low, high = MEDIUM_RISK*100, HIGH_RISK*100
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=0,
+        number={'suffix':'%','font':{'size':44,'color':'#F9FAFB','family':'Syne'}},
+        domain={'x':[0,1],'y':[0,1]},
+        gauge={
+            'axis':{'range':[0,100],'tickcolor':'#374151','tickfont':{'color':'#374151','size':10}},
+            'bar' :{'color':'#10B981','thickness':0.22},
+            'bgcolor':'#0D1424','bordercolor':'#1F2937',
+            'steps':[
+                {'range':[0,low],    'color':'rgba(16,185,129,0.08)'},
+                {'range':[low,high], 'color':'rgba(245,158,11,0.08)'},
+                {'range':[high,100], 'color':'rgba(239,68,68,0.08)'}
+            ],
+            'threshold':{'line':{'color':'#10B981','width':3},'thickness':0.85,'value':0}
+        }
+    ))
+    fig.update_layout(
+        template=_EMPTY_TEMPLATE,
+        height=260,margin=dict(t=15,b=15,l=25,r=25),
+        paper_bgcolor='rgba(0,0,0,0)',plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='DM Sans')
+    )
+    return fig
+
+
+def patch_gauge(fig, pct, color):
+    """Set the gauge's value and colour in place; returns ``fig``."""
+    ind = fig.data[0]
+    ind.value = pct
+    ind.gauge.bar.color = color
+    ind.gauge.threshold.line.color = color
+    ind.gauge.threshold.value = pct
+    return fig
+
+
+def whatif_heatmap(matrix):
+    """Churn probability heatmap from ``whatif.contract_payment_matrix``."""
+    z = matrix.to_numpy(dtype=float) * 100
+    fig = go.Figure(go.Heatmap(
+        z=z, x=list(matrix.columns), y=list(matrix.index), zmin=0, zmax=100,
+        colorscale=[[0,'#10B981'],[MEDIUM_RISK,'#F59E0B'],[HIGH_RISK,'#EF4444'],[1,'#7F1D1D']],
+        text=[[f"{v:.1f}%" if v == v else '' for v in row] for row in z], texttemplate='%{text}',
+        hovertemplate='%{y} · %{x}<br>churn %{z:.1f}%<extra></extra>', showscale=False
+    ))
+    fig.update_layout(
+        template=_EMPTY_TEMPLATE,
+        title=dict(text='Churn by Contract × Payment',font=dict(family='Syne',size=13,color='#F9FAFB')),
+        height=300,margin=dict(t=40,b=10,l=10,r=10),
+        paper_bgcolor='rgba(0,0,0,0)',plot_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(tickfont=dict(size=10,color='#9CA3AF')),
+        yaxis=dict(tickfont=dict(size=10,color='#9CA3AF')),
+        font=dict(family='DM Sans',color='#F9FAFB')
+    )
+    return fig
+
+
+def portfolio_figure(table, title):
+    """Revenue at risk per cohort (bars), coloured by mean predicted churn."""
+    labels = [' · '.join(map(str, i)) if isinstance(i, tuple) else str(i) for i in table.index]
+    rate = table['churn_rate'].to_numpy()
+    fig = go.Figure(go.Bar(
+        x=labels, y=table['revenue_at_risk'],
+        marker=dict(color=rate,cmin=0,cmax=1,showscale=False,
+                    colorscale=[[0,'#10B981'],[MEDIUM_RISK,'#F59E0B'],[HIGH_RISK,'#EF4444'],[1,'#7F1D1D']]),
+        text=[f"{r:.0%}" for r in rate],textposition='outside',textfont=dict(color='#6B7280',size=10),
+        customdata=table['customers'],
+        hovertemplate='%{x}<br>$%{y:,.0f}/mo at risk<br>%{customdata:,} customers<extra></extra>'
+    ))
+    fig.update_layout(
+        template=_EMPTY_TEMPLATE,
+        title=dict(text=title,font=dict(family='Syne',size=13,color='#F9FAFB')),
+        height=340,margin=dict(t=40,b=10,l=10,r=10),
+        paper_bgcolor='rgba(0,0,0,0)',plot_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(tickfont=dict(size=10,color='#9CA3AF')),
+        yaxis=dict(showgrid=False,tickprefix='$',tickfont=dict(size=10,color='#6B7280')),
+        font=dict(family='DM Sans')
+    )
+    return fig
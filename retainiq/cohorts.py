@@ -0,0 +1,245 @@
+"""Portfolio cohort cube over scored customers.
+
+Scored customers are aggregated into a dense NumPy cube with one axis per
+dimension (contract, internet service, payment method, gender, senior citizen,
+partner, dependents, paperless billing, tenure bucket, risk band). Each cell
+holds the customer count, summed predicted churn, summed ``MonthlyCharges``
+and revenue at risk (``MonthlyCharges`` x churn probability). A batch is added
+with one ``np.bincount`` per measure, and new scores can be added or
+subtracted as they arrive. Slicing and regrouping only sum over a ~17k-cell
+array, so it never touches the customer rows again.
+
+The phone and internet service flags (``PhoneService`` ... ``StreamingMovies``)
+are not axes: eight more would multiply the cube by 2**8 or more. Slice those
+from the customer file instead.
+
+    python -m retainiq.cohorts build customers.csv -o portfolio.npz
+    python -m retainiq.cohorts build --store scores.db -o portfolio.npz
+    python -m retainiq.cohorts show portfolio.npz --by Contract,tenure_bucket --where InternetService=Fiber optic
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .artifacts import PORTFOLIO_PATH
+from .config import CATEGORY_LEVELS, HIGH_RISK, MEDIUM_RISK, RISK_BANDS
+
+TENURE_EDGES  = [0, 6, 12, 24, 48]
+TENURE_LABELS = ['0–5 mo', '6–11 mo', '12–23 mo', '24–47 mo', '48+ mo']
+DIMENSIONS = {
+    'Contract':CATEGORY_LEVELS['Contract'],
+    'InternetService':CATEGORY_LEVELS['InternetService'],
+    'PaymentMethod':CATEGORY_LEVELS['PaymentMethod'],
+    'gender':CATEGORY_LEVELS['gender'],
+    'SeniorCitizen':['No','Yes'],
+    'Partner':['No','Yes'],
+    'Dependents':['No','Yes'],
+    'PaperlessBilling':['No','Yes'],
+    'tenure_bucket':TENURE_LABELS,
+    'risk_band':list(RISK_BANDS),
+}
+MEASURES = ('customers', 'churn_sum', 'monthly_sum', 'revenue_at_risk')
+_YES, _NO = ['Yes','1','1.0','True'], ['No','0','0.0','False']
+
+
+def _yes_no(values):
+    """1/0 for Yes/No style values (strings, 0/1 or bools); -1 for missing or anything else."""
+    values = np.asarray(values)
+    if values.dtype.kind in 'biuf':
+        f = values.astype(np.float64)
+        return np.where(np.isnan(f), -1, f != 0).astype(np.int64)
+    values = values.astype(str)
+    return np.where(np.isin(values, _YES), 1, np.where(np.isin(values, _NO), 0, -1))
+
+
+def _codes(columns, proba):
+    """Integer level index per dimension; -1 where a value is not a known level."""
+    n = len(proba)
+    codes = []
+    for dim, levels in DIMENSIONS.items():
+        if dim == 'tenure_bucket':
+            tenure = pd.to_numeric(pd.Series(np.asarray(columns['tenure'])), errors='coerce').to_numpy()
+            c = np.searchsorted(TENURE_EDGES, tenure, side='right') - 1
+            c[np.isnan(tenure)] = -1
+        elif dim == 'risk_band':
+            c = np.searchsorted([MEDIUM_RISK, HIGH_RISK], proba, side='right')
+        elif levels == ['No','Yes']:
+            c = _yes_no(columns[dim])
+        else:
+            values = np.asarray(columns[dim])
+            c = np.full(n, -1)
+            for i, level in enumerate(levels):
+                c[values == level] = i
+        codes.append(c)
+    return codes
+
+
+class Cube:
+    """Dense aggregate arrays, one axis per entry of ``DIMENSIONS``."""
+
+    def __init__(self, data=None):
+        self.shape = tuple(len(v) for v in DIMENSIONS.values())
+        self.data = data or {m:np.zeros(self.shape) for m in MEASURES}
+        self.skipped = 0
+
+    @property
+    def customers(self):
+        return int(round(self.data['customers'].sum()))
+
+    def add(self, columns, proba, sign=1):
+        """Fold scored rows (raw columns + churn probabilities) into the cube; ``sign=-1`` removes them."""
+        proba = np.asarray(proba, dtype=np.float64)
+        codes = _codes(columns, proba)
+        ok = np.logical_and.reduce([c >= 0 for c in codes])
+        self.skipped += sign * int((~ok).sum())
+        flat = np.ravel_multi_index([c[ok] for c in codes], self.shape)
+        monthly = pd.to_numeric(pd.Series(np.asarray(columns['MonthlyCharges'])), errors='coerce').fillna(0).to_numpy()[ok]
+        p = proba[ok]
+        size = int(np.prod(self.shape))
+        for name, weights in (('customers', None), ('churn_sum', p), ('monthly_sum', monthly),
+                              ('revenue_at_risk', monthly * p)):
+            counts = np.bincount(flat, weights, minlength=size).reshape(self.shape)
+            self.data[name] += sign * counts
+        return int(ok.sum())
+
+    def remove(self, columns, proba):
+        return self.add(columns, proba, sign=-1)
+
+    def _select(self, filters):
+        index = []
+        for dim, levels in DIMENSIONS.items():
+            wanted = filters.get(dim)
+            if wanted is None:
+                index.append(np.arange(len(levels)))
+            else:
+                wanted = [wanted] if isinstance(wanted, str) else wanted
+                index.append(np.array([levels.index(w) for w in wanted], dtype=np.int64))
+        return np.ix_(*index)
+
+    def group(self, by=(), **filters):
+        """Aggregates per combination of ``by`` dimensions over the cells matching ``filters``.
+
+        ``filters`` map a dimension to one level or a list of levels. Returns a
+        DataFrame with ``customers``, ``churn_rate`` (mean predicted churn),
+        ``monthly_revenue``, ``revenue_at_risk`` and ``risk_share`` (share of
+        monthly revenue at risk); empty groups are dropped.
+        """
+        by = list(by)
+        dims = list(DIMENSIONS)
+        sel = self._select(filters)
+        other = tuple(i for i, d in enumerate(dims) if d not in by)
+        order = [dims.index(d) for d in by]
+        sums = {}
+        for m in MEASURES:
+            agg = self.data[m][sel].sum(axis=other)
+            # remaining axes are in DIMENSIONS order; put them in ``by`` order
+            sums[m] = np.transpose(agg, np.argsort(np.argsort(order))).ravel() if by else np.atleast_1d(agg)
+        if by:
+            kept = [[DIMENSIONS[d][i] for i in sel[dims.index(d)].ravel()] for d in by]
+            index = pd.MultiIndex.from_product(kept, names=by)
+        else:
+            index = pd.Index(['All'], name='portfolio')
+        df = pd.DataFrame({'customers':sums['customers'].round().astype(np.int64)}, index=index)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            df['churn_rate'] = sums['churn_sum'] / sums['customers']
+            df['monthly_revenue'] = sums['monthly_sum']
+            df['revenue_at_risk'] = sums['revenue_at_risk']
+            df['risk_share'] = sums['revenue_at_risk'] / sums['monthly_sum']
+        return df[df['customers'] > 0]
+
+    def save(self, path=PORTFOLIO_PATH):
+        tmp = f'{path}.tmp.npz'
+        np.savez(tmp, dimensions=json.dumps(DIMENSIONS), skipped=self.skipped, **self.data)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=PORTFOLIO_PATH):
+        with np.load(path) as z:
+            if json.loads(str(z['dimensions'])) != DIMENSIONS:
+                raise ValueError(f"{path} was built with different cube dimensions; rebuild it")
+            cube = cls({m:z[m].copy() for m in MEASURES})
+            cube.skipped = int(z['skipped'])
+        return cube
+
+
+# ── Builders ──────────────────────────────────────────────────────────────────
+def build_from_file(path, model, scaler=None, chunk_size=100_000):
+    """Score a customer file chunk by chunk into a new cube."""
+    from .batch import iter_chunks
+    from .encoding import FeatureEncoder
+    from .inference import predict_proba
+    encoder = FeatureEncoder(scaler)
+    cube = Cube()
+    for chunk in iter_chunks(path, chunk_size):
+        cube.add(chunk, predict_proba(model, encoder.encode_columns(chunk)))
+    return cube
+
+
+def build_from_store(store, chunk_size=100_000):
+    """Cube over the scores already held in an incremental ``ScoreStore``."""
+    cube = Cube()
+    for chunk in pd.read_sql_query('SELECT * FROM customers', store.conn, chunksize=chunk_size):
+        cube.add(chunk, chunk['churn_probability'].to_numpy())
+    return cube
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+def _filters(items):
+    out = {}
+    for item in items or []:
+        dim, value = item.split('=', 1)
+        out.setdefault(dim, []).append(value)
+    return out
+
+
+def main(argv=None):
+    from .artifacts import MODEL_PATH, MODELFILE_PATH, SCALER_PATH
+    p = argparse.ArgumentParser(prog='python -m retainiq.cohorts', description='Portfolio cohort cube.')
+    sub = p.add_subparsers(dest='cmd', required=True)
+    b = sub.add_parser('build')
+    b.add_argument('input', nargs='?', help='customer CSV or Parquet to score')
+    b.add_argument('--store', help='build from an incremental score store instead')
+    b.add_argument('-o', '--output', default=PORTFOLIO_PATH)
+    b.add_argument('--model', default=MODEL_PATH)
+    b.add_argument('--scaler', default=SCALER_PATH)
+    b.add_argument('--modelfile', default=MODELFILE_PATH)
+    s = sub.add_parser('show')
+    s.add_argument('cube', nargs='?', default=PORTFOLIO_PATH)
+    s.add_argument('--by', default='', help='comma-separated dimensions: ' + ', '.join(DIMENSIONS))
+    s.add_argument('--where', action='append', metavar='DIM=LEVEL', help='filter, repeatable')
+    args = p.parse_args(argv)
+
+    if args.cmd == 'show':
+        cube = Cube.load(args.cube)
+        t = time.perf_counter()
+        table = cube.group([d for d in args.by.split(',') if d], **_filters(args.where))
+        ms = (time.perf_counter() - t) * 1e3
+        with pd.option_context('display.width', 200, 'display.max_rows', 500):
+            print(table.to_string(float_format='%.3f'))
+        print(f"{len(table)} groups in {ms:.2f} ms", file=sys.stderr)
+        return 0
+
+    start = time.perf_counter()
+    if args.store:
+        from .incremental import ScoreStore
+        with ScoreStore(args.store) as store:
+            cube = build_from_store(store)
+    elif args.input:
+        from .artifacts import load_for_scoring
+        model, scaler = load_for_scoring(args.model, args.scaler, args.modelfile)
+        cube = build_from_file(args.input, model, scaler)
+    else:
+        p.error('build needs an input file or --store')
+    cube.save(args.output)
+    print(f"cube of {cube.customers:,} customers ({cube.skipped:,} skipped) in "
+          f"{time.perf_counter()-start:.2f}s -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
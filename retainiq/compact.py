@@ -0,0 +1,255 @@
+"""Forest compaction: fewer trees, shallower trees, compact dtypes.
+
+Produces smaller serving variants of ``model.pkl`` as model files and a report
+comparing them with the original, so the serving model is picked on measured
+accuracy and cost.
+
+* Tree selection — greedy forward selection on validation ROC AUC: each
+  step adds the tree that most improves the AUC of the running average.
+  The selection order is computed once; the first ``k`` trees give each size.
+* Depth cap / leaf merge — nodes at ``max_depth`` become leaves carrying
+  their own class fractions; a split whose two leaf children differ by at
+  most ``merge_tol`` in churn fraction is collapsed into one leaf (with the
+  default 0 only identical leaves merge, which changes no prediction).
+* Quantization — thresholds are stored as float32 rounded *down*, which is
+  exact for the float32 matrices the encoder produces; leaf fractions become
+  uint8 with a scale factor; split feature indices become uint8.
+
+Feature importances of a variant are the mean of its selected trees'
+importances, as sklearn averages them. Depth-capped or leaf-merged variants
+drop splits those importances count, so their model files carry none and the
+app leaves out the importance chart for them.
+
+The held-out split of ``retainiq.train`` is halved: one half drives tree
+selection, the other is used for the reported metrics. To serve a variant,
+copy it over ``model.riq``; ``load_for_scoring`` picks it up while it is
+newer than ``model.pkl``.
+
+    python -m retainiq.compact data/Cleaned-dataset.csv --trees all,100,50,25 --depths none,10 -o compact/
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from .artifacts import MODEL_PATH, SCALER_PATH, file_sha256, load_model, load_scaler
+from .config import FEATURE_NAMES, MEDIUM_RISK
+from .forest import CompiledForest
+
+VALUE_BITS = 8
+
+
+# ── Tree Selection ────────────────────────────────────────────────────────────
+def tree_probas(forest, X):
+    """Positive-class fraction of every tree for every row, shape (n_rows, n_trees)."""
+    return forest.value[forest.leaves(X), 1] * forest.value_scale
+
+
+def auc_columns(y, S):
+    """ROC AUC of each column of scores ``S`` (Mann-Whitney with tied ranks averaged)."""
+    from scipy.stats import rankdata
+    pos = y == 1
+    n_pos, n_neg = int(pos.sum()), int((~pos).sum())
+    ranks = rankdata(S, axis=0)
+    return (ranks[pos].sum(axis=0) - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+
+
+def greedy_order(P, y, max_trees=None):
+    """Tree indices in greedy forward-selection order, and the validation AUC after each step."""
+    T = P.shape[1]
+    remaining = list(range(T))
+    chosen, curve = [], []
+    total = np.zeros(len(y))
+    for _ in range(min(max_trees or T, T)):
+        aucs = auc_columns(y, total[:, None] + P[:, remaining])
+        best = int(np.argmax(aucs))
+        chosen.append(remaining.pop(best))
+        total += P[:, chosen[-1]]
+        curve.append(float(aucs[best]))
+    return chosen, curve
+
+
+def tree_importances(model, trees=None):
+    """``feature_importances_`` of a sklearn forest over only ``trees`` (all by default)."""
+    estimators = model.estimators_ if trees is None else [model.estimators_[t] for t in trees]
+    imp = np.mean([e.feature_importances_ for e in estimators if e.tree_.node_count > 1], axis=0)
+    return imp / imp.sum()
+
+
+# ── Tree Rewriting ────────────────────────────────────────────────────────────
+def rebuild(forest, trees=None, max_depth=None, merge_tol=0.0, feature_importances=None):
+    """New ``CompiledForest`` with the given trees, depth cap and leaf merging (float64 values).
+
+    ``forest``'s own importances cover all of its trees at full depth, so they
+    are not carried over; pass ``feature_importances`` for the new forest.
+    """
+    feature, threshold, left, right, value, is_leaf, roots = [], [], [], [], [], [], []
+
+    def visit(node, depth):
+        idx = len(feature)
+        feature.append(0); threshold.append(np.inf); left.append(idx); right.append(idx)
+        value.append(forest.value[node]); is_leaf.append(True)
+        if forest.is_leaf[node] or (max_depth is not None and depth >= max_depth):
+            return idx
+        l = visit(int(forest.left[node]), depth + 1)
+        r = visit(int(forest.right[node]), depth + 1)
+        if is_leaf[l] and is_leaf[r] and abs(value[l][1] - value[r][1]) <= merge_tol:
+            # both children are the last two entries; drop them
+            for arr in (feature, threshold, left, right, value, is_leaf):
+                del arr[idx + 1:]
+            return idx
+        feature[idx], threshold[idx] = int(forest.feature[node]), float(forest.threshold[node])
+        left[idx], right[idx], is_leaf[idx] = l, r, False
+        return idx
+
+    for t in (range(forest.n_trees) if trees is None else trees):
+        roots.append(visit(int(forest.roots[t]), 0))
+    return CompiledForest(np.array(feature, dtype=np.int32), np.array(threshold),
+                          np.array(left, dtype=np.int32), np.array(right, dtype=np.int32),
+                          np.array(value, dtype=np.float64), np.array(roots, dtype=np.int32),
+                          forest.classes_, forest.n_features_in_, is_leaf=np.array(is_leaf),
+                          feature_importances=feature_importances,
+                          model_type=forest.model_type)
+
+
+def quantize(forest, value_bits=VALUE_BITS):
+    """Compact dtypes: float32 thresholds rounded down, integer leaf fractions, small feature indices."""
+    thr = forest.threshold.astype(np.float32)
+    up = thr > forest.threshold
+    # For float32 x: x <= t  <=>  x <= largest float32 not above t.
+    thr[up] = np.nextafter(thr[up], np.float32(-np.inf))
+    levels = (1 << value_bits) - 1
+    value = np.rint(forest.value * forest.value_scale * levels).astype(np.uint8 if value_bits <= 8 else np.uint16)
+    feature = forest.feature.astype(np.uint8 if forest.n_features_in_ <= 256 else np.uint16)
+    return CompiledForest(feature, thr, forest.left, forest.right, value, forest.roots, forest.classes_,
+                          forest.n_features_in_, is_leaf=forest.is_leaf,
+                          feature_importances=getattr(forest, 'feature_importances_', None),
+                          model_type=forest.model_type, value_scale=1.0 / levels)
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+def metrics(proba, y):
+    from sklearn.metrics import recall_score, roc_auc_score
+    return {'roc_auc':float(roc_auc_score(y, proba)),
+            f'recall_at_{MEDIUM_RISK}':float(recall_score(y, proba >= MEDIUM_RISK))}
+
+
+def rows_per_sec(predict, X, repeats=3):
+    best = min(_timed(predict, X) for _ in range(repeats))
+    return len(X) / best
+
+
+def _timed(fn, X):
+    t = time.perf_counter(); fn(X); return time.perf_counter() - t
+
+
+def validation_split(data_path, scaler, cache_dir=None):
+    """(X_select, y_select, X_report, y_report) from the held-out part of ``retainiq.train``'s split."""
+    from sklearn.model_selection import train_test_split
+    from .train import CACHE_DIR, SEED, TEST_SIZE, load_features, scale
+    X_raw, y, _ = load_features(data_path, cache_dir or CACHE_DIR)
+    idx = np.arange(len(y))
+    _, held = train_test_split(idx, test_size=TEST_SIZE, random_state=SEED, stratify=y)
+    sel, rep = train_test_split(held, test_size=0.5, random_state=SEED, stratify=y[held])
+    return scale(X_raw[sel], scaler), y[sel], scale(X_raw[rep], scaler), y[rep]
+
+
+def _parse_list(text, none_word):
+    return [None if v == none_word else int(v) for v in text.split(',')]
+
+
+def run(data_path, model_path=MODEL_PATH, scaler_path=SCALER_PATH, out_dir='compact', trees=(None, 100, 50, 25),
+        depths=(None, 10), value_bits=VALUE_BITS, merge_tol=0.0, cache_dir=None, log=print):
+    from .encoding import FeatureEncoder
+    from .inference import predict_proba
+    from .modelfile import export, probe
+    from .synthetic import generate_customers
+    model, scaler = load_model(model_path), load_scaler(scaler_path)
+    if scaler is None:
+        raise ValueError(f"could not load {scaler_path}")
+    original = CompiledForest.from_sklearn(model)
+    X_sel, y_sel, X_rep, y_rep = validation_split(data_path, scaler, cache_dir)
+    X_speed = FeatureEncoder(scaler).encode_columns(generate_customers(10_000, seed=7, with_id=False))
+
+    t = time.perf_counter()
+    order, curve = greedy_order(tree_probas(original, X_sel), y_sel, max(k or 0 for k in trees) or None)
+    log(f"greedy selection: {len(order)} trees in {time.perf_counter()-t:.1f}s "
+        f"(validation AUC {curve[0]:.4f} with 1 tree -> {curve[-1]:.4f})")
+
+    os.makedirs(out_dir, exist_ok=True)
+    rows = [{'variant':'original (sklearn pickle)', 'trees':original.n_trees, 'max_depth':None, 'quantized':False,
+             'importances':True,
+             'nodes':int(len(original.feature)), 'size_mb':os.path.getsize(model_path) / 1e6,
+             'load_ms':probe('pickle', model_path, scaler_path)['load_sec'] * 1e3,
+             'rows_per_sec':rows_per_sec(lambda X: predict_proba(model, X), X_speed),
+             **metrics(predict_proba(model, X_rep), y_rep), 'path':model_path}]
+    log(_fmt(rows[0]))
+    for k in trees:
+        for depth in depths:
+            selected = None if k is None else order[:k]
+            importances = tree_importances(model, selected) if depth is None and not merge_tol else None
+            base = rebuild(original, selected, depth, merge_tol, importances)
+            for quantized in ((False, True) if value_bits else (False,)):
+                forest = quantize(base, value_bits) if quantized else base
+                name = f"t{k or 'all'}-d{depth or 'all'}" + (f"-q{value_bits}" if quantized else '')
+                path = os.path.join(out_dir, f'model-{name}.riq')
+                export(forest, scaler, FEATURE_NAMES, path,
+                       source={'compacted_from':model_path, 'scaler_sha256':file_sha256(scaler_path),
+                               'trees':k, 'max_depth':depth,
+                               'merge_tol':merge_tol, 'value_bits':value_bits if quantized else None})
+                row = {'variant':name, 'trees':forest.n_trees, 'max_depth':depth, 'quantized':quantized,
+                       'importances':importances is not None,
+                       'nodes':int(len(forest.feature)), 'size_mb':os.path.getsize(path) / 1e6,
+                       'load_ms':probe('modelfile', path, scaler_path)['load_sec'] * 1e3,
+                       'rows_per_sec':rows_per_sec(forest.predict_proba, X_speed),
+                       **metrics(forest.predict_proba(X_rep)[:, 1], y_rep), 'path':path}
+                rows.append(row)
+                log(_fmt(row))
+    ref = rows[0]['roc_auc']
+    for r in rows:
+        r['auc_delta'] = r['roc_auc'] - ref
+    report = {'created':time.strftime('%Y-%m-%dT%H:%M:%S'), 'model':model_path, 'data':data_path,
+              'selection_rows':int(len(y_sel)), 'report_rows':int(len(y_rep)),
+              'greedy_order':order, 'greedy_auc':curve, 'merge_tol':merge_tol, 'variants':rows}
+    with open(os.path.join(out_dir, 'report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+_HEADER = f"{'variant':<26} {'trees':>5} {'nodes':>8} {'MB':>6} {'load ms':>8} {'rows/sec':>10} {'AUC':>7} {'rec@.35':>7}"
+
+
+def _fmt(r):
+    return (f"{r['variant']:<26} {r['trees']:>5} {r['nodes']:>8,} {r['size_mb']:>6.2f} {r['load_ms']:>8.0f} "
+            f"{r['rows_per_sec']:>10,.0f} {r['roc_auc']:>7.4f} {r[f'recall_at_{MEDIUM_RISK}']:>7.3f}")
+
+
+def main(argv=None):
+    from .train import CACHE_DIR, DATA_PATH
+    p = argparse.ArgumentParser(prog='python -m retainiq.compact', description='Build and compare compacted forests.')
+    p.add_argument('data', nargs='?', default=DATA_PATH, help='cleaned Telco CSV with a Churn column')
+    p.add_argument('--model', default=MODEL_PATH)
+    p.add_argument('--scaler', default=SCALER_PATH)
+    p.add_argument('-o', '--out-dir', default='compact')
+    p.add_argument('--cache-dir', default=CACHE_DIR, help='encoded feature store shared with retainiq.train')
+    p.add_argument('--trees', default='all,100,50,25', help="tree counts to keep ('all' for every tree)")
+    p.add_argument('--depths', default='none,10', help="depth caps ('none' for uncapped)")
+    p.add_argument('--value-bits', type=int, default=VALUE_BITS, choices=[0, 8, 16], help='0 skips quantized variants')
+    p.add_argument('--merge-tol', type=float, default=0.0, help='merge sibling leaves this close in churn fraction')
+    args = p.parse_args(argv)
+    if not os.path.exists(args.data):
+        sys.exit(f"{args.data} not found")
+    print(_HEADER, file=sys.stderr)
+    run(args.data, args.model, args.scaler, args.out_dir, _parse_list(args.trees, 'all'),
+        _parse_list(args.depths, 'none'), args.value_bits, args.merge_tol, args.cache_dir,
+        log=lambda msg: print(msg, file=sys.stderr, flush=True))
+    print(f"report: {os.path.join(args.out_dir, 'report.json')}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
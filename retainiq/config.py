@@ -0,0 +1,54 @@
+"""Feature layout and risk thresholds shared by the dashboard and scoring tools.
+
+The layout mirrors ``notebook/feature-engineering.ipynb``: Yes/No columns are
+mapped to 1/0, the four multi-category columns are one-hot encoded with
+``drop_first=True`` and the three numeric columns are standardised.
+"""
+import numpy as np
+
+# ── Model Input Layout ────────────────────────────────────────────────────────
+FEATURE_NAMES = [
+    'SeniorCitizen','Partner','Dependents','tenure',
+    'PhoneService','MultipleLines','OnlineSecurity','OnlineBackup',
+    'DeviceProtection','TechSupport','StreamingTV','StreamingMovies',
+    'PaperlessBilling','MonthlyCharges','TotalCharges','gender_Male',
+    'InternetService_Fiber optic','InternetService_No',
+    'Contract_One year','Contract_Two year',
+    'PaymentMethod_Credit card (automatic)',
+    'PaymentMethod_Electronic check','PaymentMethod_Mailed check'
+]
+NUM_FEATURES = ['tenure','MonthlyCharges','TotalCharges']
+SCALE_STATS  = {
+    'tenure':{'mean':32.49,'std':24.57},
+    'MonthlyCharges':{'mean':64.93,'std':30.14},
+    'TotalCharges':{'mean':2299.33,'std':2279.00}
+}
+
+# ── Raw (Telco) Columns ───────────────────────────────────────────────────────
+BINARY_COLUMNS = [
+    'SeniorCitizen','Partner','Dependents','PhoneService','MultipleLines',
+    'OnlineSecurity','OnlineBackup','DeviceProtection','TechSupport',
+    'StreamingTV','StreamingMovies','PaperlessBilling'
+]
+# Every level of each one-hot group; the first one is the dropped baseline.
+CATEGORY_LEVELS = {
+    'gender'         :['Female','Male'],
+    'InternetService':['DSL','Fiber optic','No'],
+    'Contract'       :['Month-to-month','One year','Two year'],
+    'PaymentMethod'  :['Bank transfer (automatic)','Credit card (automatic)','Electronic check','Mailed check'],
+}
+RAW_COLUMNS = ['gender'] + BINARY_COLUMNS + ['tenure','MonthlyCharges','TotalCharges',
+                                            'InternetService','Contract','PaymentMethod']
+ID_COLUMN = 'customerID'
+
+# ── Risk Bands ────────────────────────────────────────────────────────────────
+MEDIUM_RISK = 0.35
+HIGH_RISK   = 0.60
+RISK_BANDS  = np.array(['LOW','MEDIUM','HIGH'])
+
+
+def risk_band(probability):
+    """Map churn probabilities (scalar or array) to LOW/MEDIUM/HIGH."""
+    idx = (np.asarray(probability) >= MEDIUM_RISK).astype(np.int8) + (np.asarray(probability) >= HIGH_RISK)
+    band = RISK_BANDS[idx]
+    return band if np.ndim(band) else str(band)
@@ -0,0 +1,214 @@
+"""Pandas-free encoder from raw customer fields to the model input matrix.
+
+Raw values are written straight into a preallocated float32 matrix in
+``FEATURE_NAMES`` order: Yes/No columns become 1/0, each one-hot group is
+filled from a level -> column lookup table and the numeric columns are
+standardised in place with the scaler's ``mean_``/``scale_``, matched to
+``NUM_FEATURES`` through ``feature_names_in_`` (or the approximate
+``SCALE_STATS`` when no scaler is available). One-row dashboard calls and
+million-row batches share the same code path. Category values outside
+``CATEGORY_LEVELS`` (a miscased ``'one year'``, a blank ``Contract``) would
+silently encode as the dropped baseline level, so the encoder counts them in
+``unknown`` / ``unknown_rows``.
+
+    python -m retainiq.encoding --check   # parity with app.py and get_dummies
+"""
+import sys
+
+import numpy as np
+
+from .config import (BINARY_COLUMNS, CATEGORY_LEVELS, FEATURE_NAMES,
+                     NUM_FEATURES, RAW_COLUMNS, SCALE_STATS)
+
+DTYPE = np.float32
+_INDEX = {name:i for i,name in enumerate(FEATURE_NAMES)}
+_BINARY_IDX = [(col,_INDEX[col]) for col in BINARY_COLUMNS]
+_NUM_IDX    = [(col,_INDEX[col]) for col in NUM_FEATURES]
+# Level -> output column for every one-hot group; the dropped baseline has no column.
+_ONE_HOT = {col:{level:_INDEX[f'{col}_{level}'] for level in levels[1:]}
+            for col,levels in CATEGORY_LEVELS.items()}
+# Values read as "yes" in a Yes/No column; 1 also matches True, 1.0 and NumPy booleans.
+_TRUTHY = ('Yes','1',1)
+
+
+def _truthy(values):
+    """Yes/No column as a bool array, by the same rule ``encode_record`` applies to one value."""
+    arr = np.asarray(values)
+    if arr.dtype.kind in 'US' and not isinstance(values, np.ndarray):
+        arr = np.asarray(values, dtype=object)   # NumPy turns a mixed list into strings: True -> 'True'
+    if arr.dtype.kind in 'biuf':
+        return arr == 1
+    if arr.dtype.kind in 'US':
+        return (arr == 'Yes') | (arr == '1')
+    # Object columns can mix strings, booleans and numbers (e.g. JSON payloads batched together).
+    return (arr == 'Yes') | (arr == '1') | (arr == 1)
+
+
+def _to_float(values):
+    """Numeric column as float64, with blanks and unparsable values as 0."""
+    arr = np.asarray(values)
+    if arr.dtype.kind not in 'biuf':
+        try:
+            arr = arr.astype(np.float64)
+        except (TypeError, ValueError):
+            arr = np.array([_parse_float(v) for v in arr], dtype=np.float64)
+    arr = arr.astype(np.float64, copy=False)
+    return np.where(np.isnan(arr), 0.0, arr)
+
+
+def _parse_float(v):
+    """One numeric value as float, with blanks, NaN and unparsable values as 0 like ``_to_float``."""
+    try: f = float(v)
+    except (TypeError, ValueError): return 0.0
+    return 0.0 if f != f else f
+
+
+class FeatureEncoder:
+    """Encode raw customer fields into the scaled ``FEATURE_NAMES`` layout."""
+
+    def __init__(self, scaler=None):
+        if scaler is not None:
+            # Fitted statistics follow the scaler's own column order, not necessarily NUM_FEATURES.
+            names = [str(c) for c in getattr(scaler, 'feature_names_in_', NUM_FEATURES)]
+            if sorted(names) != sorted(NUM_FEATURES):
+                raise ValueError(f"scaler was fitted on {names}, expected {NUM_FEATURES}")
+            order = [names.index(c) for c in NUM_FEATURES]
+            self.mean  = np.asarray(scaler.mean_, dtype=np.float64)[order]
+            self.scale = np.asarray(scaler.scale_, dtype=np.float64)[order]
+        else:
+            self.mean  = np.array([SCALE_STATS[c]['mean'] for c in NUM_FEATURES])
+            self.scale = np.array([SCALE_STATS[c]['std']  for c in NUM_FEATURES])
+        self.approximate = scaler is None
+        self.unknown = dict.fromkeys(CATEGORY_LEVELS, 0)   # values outside CATEGORY_LEVELS, per column
+        self.unknown_rows = 0
+
+    def encode_record(self, record):
+        """Encode one customer given as a mapping of raw column -> value; shape (1, n_features)."""
+        row = np.zeros((1,len(FEATURE_NAMES)), dtype=DTYPE)
+        out = row[0]
+        for col,i in _BINARY_IDX:
+            out[i] = record[col] in _TRUTHY
+        for k,(col,i) in enumerate(_NUM_IDX):
+            out[i] = (_parse_float(record[col])-self.mean[k])/self.scale[k]
+        bad = False
+        for col,table in _ONE_HOT.items():
+            value = record[col]
+            i = table.get(value)
+            if i is not None:
+                out[i] = 1.0
+            elif value != CATEGORY_LEVELS[col][0]:
+                self.unknown[col] += 1
+                bad = True
+        self.unknown_rows += bad
+        return row
+
+    def encode_columns(self, columns, out=None):
+        """Encode column-oriented input (a DataFrame or mapping of raw column -> array).
+
+        ``out`` may be a preallocated ``(n, n_features)`` float32 matrix to reuse
+        between chunks of the same size.
+        """
+        missing = [c for c in RAW_COLUMNS if c not in columns]
+        if missing:
+            raise ValueError(f"input is missing columns: {missing}")
+        n = len(columns[RAW_COLUMNS[0]])
+        if out is None:
+            out = np.empty((n,len(FEATURE_NAMES)), dtype=DTYPE)
+        out[:] = 0.0
+        for col,i in _BINARY_IDX:
+            out[:,i] = _truthy(columns[col])
+        for k,(col,i) in enumerate(_NUM_IDX):
+            out[:,i] = (_to_float(columns[col])-self.mean[k])/self.scale[k]
+        bad = np.zeros(n, dtype=bool)
+        for col,table in _ONE_HOT.items():
+            values = np.asarray(columns[col])
+            known = values == CATEGORY_LEVELS[col][0]
+            for level,i in table.items():
+                hit = values == level
+                out[:,i] = hit
+                known |= hit
+            if not known.all():
+                self.unknown[col] += int(n - known.sum())
+                bad |= ~known
+        self.unknown_rows += int(bad.sum())
+        return out
+
+
+# ── Parity Check ──────────────────────────────────────────────────────────────
+def _legacy_app_row(r):
+    """The hand-written encoding dict ``app.py`` used before this module."""
+    return {
+        'SeniorCitizen':1 if r['SeniorCitizen']=="Yes" else 0, 'Partner':1 if r['Partner']=="Yes" else 0,
+        'Dependents':1 if r['Dependents']=="Yes" else 0, 'PhoneService':1 if r['PhoneService']=="Yes" else 0,
+        'MultipleLines':1 if r['MultipleLines']=="Yes" else 0, 'OnlineSecurity':1 if r['OnlineSecurity']=="Yes" else 0,
+        'OnlineBackup':1 if r['OnlineBackup']=="Yes" else 0, 'DeviceProtection':1 if r['DeviceProtection']=="Yes" else 0,
+        'TechSupport':1 if r['TechSupport']=="Yes" else 0, 'StreamingTV':1 if r['StreamingTV']=="Yes" else 0,
+        'StreamingMovies':1 if r['StreamingMovies']=="Yes" else 0, 'PaperlessBilling':1 if r['PaperlessBilling']=="Yes" else 0,
+        'tenure':float(r['tenure']), 'MonthlyCharges':float(r['MonthlyCharges']), 'TotalCharges':float(r['TotalCharges']),
+        'gender_Male':1 if r['gender']=="Male" else 0,
+        'InternetService_Fiber optic':1 if r['InternetService']=="Fiber optic" else 0,
+        'InternetService_No':1 if r['InternetService']=="No" else 0,
+        'Contract_One year':1 if r['Contract']=="One year" else 0,
+        'Contract_Two year':1 if r['Contract']=="Two year" else 0,
+        'PaymentMethod_Credit card (automatic)':1 if r['PaymentMethod']=="Credit card (automatic)" else 0,
+        'PaymentMethod_Electronic check':1 if r['PaymentMethod']=="Electronic check" else 0,
+        'PaymentMethod_Mailed check':1 if r['PaymentMethod']=="Mailed check" else 0,
+    }
+
+
+def _parity_sample(n=2000, seed=0):
+    """Random raw rows covering every category level, as a dict of columns."""
+    rng = np.random.default_rng(seed)
+    cols = {c:rng.choice(['No','Yes'], n) for c in BINARY_COLUMNS}
+    cols.update({c:rng.choice(levels, n) for c,levels in CATEGORY_LEVELS.items()})
+    cols['tenure'] = rng.integers(0,73,n).astype(float)
+    cols['MonthlyCharges'] = rng.uniform(18,120,n).round(2)
+    cols['TotalCharges'] = (cols['MonthlyCharges']*np.maximum(cols['tenure'],1)).round(2)
+    return cols
+
+
+def check_parity(scaler=None, n=2000):
+    """Compare the encoder with the old ``app.py`` dict and the notebook's ``get_dummies``.
+
+    Returns a list of mismatch descriptions; empty means both paths agree.
+    """
+    import pandas as pd
+    enc  = FeatureEncoder(scaler)
+    cols = _parity_sample(n)
+    got  = enc.encode_columns(cols)
+    errors = []
+
+    def scaled(df):
+        df = df[FEATURE_NAMES].astype(np.float64)
+        df[NUM_FEATURES] = (df[NUM_FEATURES].values-enc.mean)/enc.scale
+        return df.values.astype(DTYPE)
+
+    # app.py: one dict per row, then DataFrame + column reindex.
+    rows  = [{c:cols[c][i] for c in RAW_COLUMNS} for i in range(n)]
+    app   = scaled(pd.DataFrame([_legacy_app_row(r) for r in rows]))
+    if not np.array_equal(got, app):
+        errors.append(f"encode_columns differs from app.py encoding in {int((got!=app).any(axis=1).sum())} rows")
+    single = np.vstack([enc.encode_record(r) for r in rows[:200]])
+    if not np.array_equal(single, app[:200]):
+        errors.append("encode_record differs from app.py encoding")
+
+    # Notebook: map Yes/No, then get_dummies(drop_first=True) over the raw frame.
+    raw = pd.DataFrame(cols)[RAW_COLUMNS]
+    for c in BINARY_COLUMNS:
+        raw[c] = raw[c].map({'Yes':1,'No':0})
+    nb = pd.get_dummies(raw, columns=list(CATEGORY_LEVELS), drop_first=True)
+    if sorted(nb.columns) != sorted(FEATURE_NAMES):
+        errors.append(f"get_dummies columns differ: {sorted(set(nb.columns) ^ set(FEATURE_NAMES))}")
+    elif not np.array_equal(got, scaled(nb)):
+        errors.append("encode_columns differs from notebook get_dummies encoding")
+    return errors
+
+
+if __name__ == '__main__':
+    from .artifacts import load_scaler
+    if '--check' not in sys.argv[1:]:
+        sys.exit(__doc__)
+    problems = check_parity(load_scaler())
+    for p in problems: print(f"FAIL: {p}", file=sys.stderr)
+    print("encoder parity: " + ("FAILED" if problems else "ok"))
+    sys.exit(1 if problems else 0)
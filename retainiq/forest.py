@@ -0,0 +1,156 @@
+"""Flattened random-forest inference.
+
+At load time every tree of the fitted forest is copied into one set of
+contiguous node arrays (split feature, threshold, children, per-class leaf
+values). Prediction then walks all trees for all rows together, one depth
+level per NumPy step, and returns probability and class from the same pass
+instead of calling sklearn's ``predict_proba`` and ``predict`` separately.
+
+    python -m retainiq.forest --check   # parity and latency against sklearn
+"""
+import sys
+import time
+import warnings
+
+import numpy as np
+
+# Rows per traversal block; bounds the (rows x trees) index matrices.
+BLOCK_ROWS = 4096
+
+
+class CompiledForest:
+    """All trees of a fitted forest classifier as flat node arrays."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, n_features,
+                 is_leaf=None, feature_importances=None, model_type='RandomForestClassifier', value_scale=1.0):
+        self.feature    = feature      # int32, split feature (0 for leaves)
+        self.threshold  = threshold    # float64, go left if x <= threshold
+        self.left       = left         # int32, global node index; leaves point to themselves
+        self.right      = right
+        self.value      = value        # float64 (n_nodes, n_classes), per-tree class fractions
+        self.value_scale = value_scale # multiplier for quantized (integer) values
+        self.roots      = roots        # int32, root node index of each tree
+        self.classes_   = classes
+        self.n_features_in_ = n_features
+        self.is_leaf    = left == np.arange(len(left), dtype=left.dtype) if is_leaf is None else is_leaf
+        self.model_type = model_type
+        if feature_importances is not None:
+            self.feature_importances_ = feature_importances
+
+    @classmethod
+    def from_sklearn(cls, model):
+        trees = [est.tree_ for est in model.estimators_]
+        sizes = np.array([t.node_count for t in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        feature, threshold, left, right, value = [], [], [], [], []
+        for tree, off in zip(trees, offsets):
+            leaf = tree.children_left == -1
+            idx = np.arange(tree.node_count)
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(np.where(leaf, np.inf, tree.threshold))
+            left.append(np.where(leaf, idx, tree.children_left) + off)
+            right.append(np.where(leaf, idx, tree.children_right) + off)
+            v = tree.value[:,0,:].astype(np.float64)
+            value.append(v / v.sum(axis=1, keepdims=True))
+        return cls(np.concatenate(feature).astype(np.int32), np.concatenate(threshold),
+                   np.concatenate(left).astype(np.int32), np.concatenate(right).astype(np.int32),
+                   np.concatenate(value), offsets.astype(np.int32),
+                   np.asarray(model.classes_), model.n_features_in_,
+                   feature_importances=np.asarray(model.feature_importances_),
+                   model_type=type(model).__name__)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def leaves(self, X):
+        """Leaf node index reached in every tree, shape (n_rows, n_trees)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        flat = X.ravel()
+        n, T = len(X), self.n_trees
+        idx = np.tile(self.roots, n)
+        base = np.repeat(np.arange(n, dtype=np.int64) * X.shape[1], T)
+        # Only (row, tree) pairs still at an internal node are advanced each level.
+        active = np.flatnonzero(~self.is_leaf[idx])
+        while active.size:
+            node = idx[active]
+            go_left = flat[base[active] + self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+            idx[active] = node
+            active = active[~self.is_leaf[node]]
+        return idx.reshape(n, T)
+
+    def _class_sums(self, X):
+        out = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = X[start:start+BLOCK_ROWS]
+            out[start:start+len(block)] = self.value[self.leaves(block)].sum(axis=1, dtype=np.float64)
+        if self.value_scale != 1.0:
+            out *= self.value_scale
+        return out
+
+    def predict_proba(self, X):
+        """Class probabilities with the same layout as sklearn's ``predict_proba``."""
+        return self._class_sums(X) / self.n_trees
+
+    def predict(self, X):
+        return self.classes_[self._class_sums(X).argmax(axis=1)]
+
+    def predict_with_proba(self, X):
+        """(positive-class probability, predicted class) from a single traversal."""
+        proba = self.predict_proba(X)
+        return proba[:,1], self.classes_[proba.argmax(axis=1)]
+
+
+def compile_model(model):
+    """Flatten tree ensembles; any other estimator is returned unchanged."""
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is not None and all(hasattr(e, 'tree_') for e in estimators):
+        return CompiledForest.from_sklearn(model)
+    return model
+
+
+# ── Parity / Latency Check ────────────────────────────────────────────────────
+def check_parity(model, X, atol=1e-9):
+    """Compare a compiled copy of ``model`` with sklearn on matrix ``X``; returns mismatch messages."""
+    from .inference import predict_proba
+    forest = CompiledForest.from_sklearn(model)
+    ref = predict_proba(model, X)
+    got, pred = forest.predict_with_proba(X)
+    errors = []
+    if not np.allclose(got, ref, rtol=0, atol=atol):
+        errors.append(f"probabilities differ by up to {np.abs(got-ref).max():.3g}")
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        ref_pred = model.predict(X)
+    if (pred != ref_pred).any():
+        errors.append(f"{int((pred != ref_pred).sum())} predictions differ")
+    return errors
+
+
+def _latency(fn, X, repeats):
+    times = []
+    for i in range(repeats):
+        row = X[i % len(X):i % len(X)+1]
+        t = time.perf_counter(); fn(row); times.append(time.perf_counter()-t)
+    return np.percentile(np.array(times)*1e3, [50, 99])
+
+
+if __name__ == '__main__':
+    if '--check' not in sys.argv[1:]:
+        sys.exit(__doc__)
+    from .artifacts import load_model, load_scaler
+    from .encoding import FeatureEncoder, _parity_sample
+    from .inference import predict_proba
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    model = load_model()
+    X = FeatureEncoder(load_scaler()).encode_columns(_parity_sample(5000))
+    problems = check_parity(model, X)
+    for p in problems: print(f"FAIL: {p}", file=sys.stderr)
+    print("forest parity: " + ("FAILED" if problems else "ok"))
+    forest = CompiledForest.from_sklearn(model)
+    sk = _latency(lambda r: (predict_proba(model, r), model.predict(r)), X, 200)
+    cf = _latency(forest.predict_with_proba, X, 200)
+    print(f"single row  sklearn p50 {sk[0]:.2f} ms  p99 {sk[1]:.2f} ms")
+    print(f"single row  compiled p50 {cf[0]:.2f} ms  p99 {cf[1]:.2f} ms")
+    sys.exit(1 if problems else 0)
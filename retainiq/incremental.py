@@ -0,0 +1,326 @@
+"""Incremental rescoring from customer change events.
+
+A SQLite file keeps, per ``customerID``, the current raw fields, the last
+encoded ``FEATURE_NAMES`` vector and the score it produced. Change events
+carry a customer id plus only the fields that changed (missing or blank means
+unchanged). Each batch of events is folded per customer, merged onto the
+stored fields and re-encoded; only customers whose encoded vector actually
+differs are sent to the model, in one call per batch. The output lists score
+deltas and risk-band transitions for those customers. With ``--cube`` the
+portfolio cube from ``retainiq.cohorts`` is kept in step: rescored customers
+are subtracted at their old score and added back at the new one.
+
+    python -m retainiq.incremental init customers.csv --store scores.db [--replace]
+    python -m retainiq.incremental apply events.jsonl --store scores.db -o deltas.csv
+    python -m retainiq.incremental apply events.jsonl --store scores.db --cube portfolio.npz
+    tail -f events.jsonl | python -m retainiq.incremental apply - --store scores.db
+    python -m retainiq.incremental bench --customers 100000 --events 50000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .config import FEATURE_NAMES, ID_COLUMN, RAW_COLUMNS, risk_band
+from .encoding import DTYPE, FeatureEncoder
+from .inference import predict_proba
+
+STORE_PATH = "scores.db"
+DEFAULT_BATCH = 10_000
+DELTA_COLUMNS = [ID_COLUMN, 'previous_probability', 'churn_probability', 'delta',
+                 'previous_band', 'risk_band', 'transition']
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+class ScoreStore:
+    """Per-customer raw fields, encoded vector and score in one SQLite table."""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        cols = ', '.join(f'"{c}"' for c in RAW_COLUMNS)
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS customers ({ID_COLUMN} TEXT PRIMARY KEY, {cols}, '
+                          'vector BLOB, churn_probability REAL, risk_band TEXT, updated_at REAL)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM customers').fetchone()[0]
+
+    def fetch(self, ids):
+        """Stored rows for ``ids`` (those that exist), indexed by customer id."""
+        self.conn.execute(f'CREATE TEMP TABLE IF NOT EXISTS wanted ({ID_COLUMN} TEXT PRIMARY KEY)')
+        self.conn.execute('DELETE FROM wanted')
+        self.conn.executemany('INSERT OR IGNORE INTO wanted VALUES (?)', ((i,) for i in ids))
+        df = pd.read_sql_query(f'SELECT c.* FROM customers c JOIN wanted USING ({ID_COLUMN})', self.conn)
+        return df.set_index(ID_COLUMN)
+
+    def upsert(self, raw, vectors, proba, bands):
+        """Write raw fields, vectors and scores for the customers in ``raw`` (indexed by id)."""
+        now = time.time()
+        names = [ID_COLUMN, *RAW_COLUMNS, 'vector', 'churn_probability', 'risk_band', 'updated_at']
+        raw = _clean(raw)
+        cols = [raw.index.tolist()] + [raw[c].tolist() for c in RAW_COLUMNS]
+        rows = zip(*cols, (v.tobytes() for v in vectors), proba.tolist(), bands.tolist(), [now] * len(raw))
+        quoted = ', '.join(f'"{n}"' for n in names)
+        with self.conn:
+            self.conn.executemany(f'INSERT OR REPLACE INTO customers ({quoted}) VALUES ({", ".join("?" * len(names))})', rows)
+
+    def clear(self):
+        """Drop every stored customer and the metadata, e.g. before loading a new base."""
+        with self.conn:
+            self.conn.execute('DELETE FROM customers')
+            self.conn.execute('DELETE FROM meta')
+
+    def get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key=?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, json.dumps(value)))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+
+def _vectors(blobs):
+    return np.frombuffer(b''.join(blobs), dtype=DTYPE).reshape(-1, len(FEATURE_NAMES))
+
+
+def _clean(raw):
+    """Raw fields as SQLite-friendly Python values (NaN -> NULL, NumPy scalars unwrapped).
+
+    Only for writing: the encoder needs the typed columns (an object column of
+    0/1 ``SeniorCitizen`` values would be read as strings).
+    """
+    return raw.astype(object).where(raw.notna(), None)
+
+
+# ── Scoring ───────────────────────────────────────────────────────────────────
+class IncrementalScorer:
+    """Applies change events to a ``ScoreStore`` with one model call per batch."""
+
+    def __init__(self, store, model, scaler=None, cube=None):
+        self.store = store
+        self.model = model
+        self.encoder = FeatureEncoder(scaler)
+        self.cube = cube
+
+    def load(self, chunks):
+        """Score a full customer base (iterable of raw DataFrames with ``customerID``) into the store."""
+        rows = 0
+        for chunk in chunks:
+            if ID_COLUMN not in chunk.columns:
+                raise ValueError(f"customer file has no {ID_COLUMN} column")
+            raw = chunk.drop_duplicates(ID_COLUMN, keep='last').set_index(ID_COLUMN)[RAW_COLUMNS]
+            X = self.encoder.encode_columns(raw)
+            proba = predict_proba(self.model, X)
+            self.store.upsert(raw, X, proba, risk_band(proba))
+            if self.cube is not None:
+                self.cube.add(raw, proba)
+            rows += len(raw)
+        return rows
+
+    def apply(self, events):
+        """Fold a batch of change events into the store; returns (deltas DataFrame, stats dict).
+
+        Fields absent or null in an event are unchanged; for several events on
+        one customer the latest non-null value of each field wins. Unknown ids
+        are inserted when the event carries every raw field, otherwise counted
+        as ``incomplete``.
+        """
+        changes = events.groupby(ID_COLUMN, sort=False).last()
+        changes = changes[[c for c in RAW_COLUMNS if c in changes.columns]]
+        stored = self.store.fetch(changes.index)
+        known = changes.index.isin(stored.index)
+        fresh = changes[~known].reindex(columns=RAW_COLUMNS)
+        complete = fresh.notna().all(axis=1)
+
+        merged = changes[known].combine_first(stored[RAW_COLUMNS]).loc[changes.index[known], RAW_COLUMNS]
+        raw = pd.concat([merged, fresh[complete]]).infer_objects()
+        X = self.encoder.encode_columns(raw)
+        n_known = len(merged)
+        previous = _vectors(stored.loc[merged.index, 'vector'])
+        changed = np.ones(len(raw), dtype=bool)
+        changed[:n_known] = (X[:n_known] != previous).any(axis=1)
+
+        old_proba = np.full(len(raw), np.nan)
+        old_proba[:n_known] = stored.loc[merged.index, 'churn_probability'].to_numpy()
+        proba = old_proba.copy()
+        if changed.any():
+            proba[changed] = predict_proba(self.model, X[changed])
+        bands = risk_band(proba)
+        self.store.upsert(raw, X, proba, bands)
+        if self.cube is not None:
+            was = changed[:n_known]
+            self.cube.remove(stored.loc[merged.index[was], RAW_COLUMNS], old_proba[:n_known][was])
+            self.cube.add(raw[changed], proba[changed])
+
+        old_bands = np.where(np.isnan(old_proba), '', risk_band(np.nan_to_num(old_proba)))
+        deltas = pd.DataFrame({
+            ID_COLUMN:raw.index[changed], 'previous_probability':old_proba[changed],
+            'churn_probability':proba[changed], 'delta':(proba - old_proba)[changed],
+            'previous_band':old_bands[changed], 'risk_band':bands[changed],
+        })
+        moved = deltas['previous_band'] != deltas['risk_band']
+        deltas['transition'] = np.where(moved, deltas['previous_band'].replace('', 'NEW') + '→' + deltas['risk_band'], '')
+        deltas = deltas[DELTA_COLUMNS]
+        stats = {'events':len(events), 'customers':len(changes), 'new':int((~known).sum() - (~complete).sum()),
+                 'incomplete':int((~complete).sum()), 'rescored':int(changed.sum()),
+                 'unchanged':int(n_known - changed[:n_known].sum()), 'transitions':int(moved.sum())}
+        return deltas, stats
+
+    def apply_stream(self, batches, on_deltas=None):
+        """``apply`` over an iterable of event batches; returns summed stats with throughput."""
+        totals = dict.fromkeys(['events','customers','new','incomplete','rescored','unchanged','transitions'], 0)
+        start = time.perf_counter()
+        for batch in batches:
+            deltas, stats = self.apply(batch)
+            for k, v in stats.items(): totals[k] += v
+            if on_deltas: on_deltas(deltas)
+        seconds = time.perf_counter() - start
+        totals.update(seconds=seconds, events_per_sec=totals['events']/seconds if seconds else 0.0)
+        return totals
+
+
+# ── Event I/O ─────────────────────────────────────────────────────────────────
+def _iter_jsonl(f, batch_size):
+    records = []
+    for line in f:
+        if line.strip():
+            records.append(json.loads(line))
+        if len(records) >= batch_size:
+            yield pd.DataFrame(records); records = []
+    if records:
+        yield pd.DataFrame(records)
+
+
+def iter_events(path, batch_size=DEFAULT_BATCH):
+    """Event batches from JSON lines (``-`` for stdin), CSV or Parquet."""
+    if path == '-':
+        yield from _iter_jsonl(sys.stdin, batch_size)
+    elif os.path.splitext(path)[1].lower() in ('.jsonl','.ndjson','.json'):
+        with open(path) as f:
+            yield from _iter_jsonl(f, batch_size)
+    else:
+        from .batch import iter_chunks
+        yield from iter_chunks(path, batch_size)
+
+
+# ── Benchmark ─────────────────────────────────────────────────────────────────
+# Fields events touch, with how often; the rest of an event is left unchanged.
+_EVENT_FIELDS = {'tenure':0.45, 'MonthlyCharges':0.25, 'Contract':0.1, 'PaymentMethod':0.1, 'TechSupport':0.1}
+
+
+def _synthetic_events(base, n, seed=0, noop=0.2):
+    """``n`` single-field events against ``base`` columns; a ``noop`` share re-sends the current value."""
+    from .synthetic import generate_customers
+    rng = np.random.default_rng(seed)
+    pool = generate_customers(n, seed + 1, with_id=False)
+    who = rng.integers(0, len(base[ID_COLUMN]), n)
+    field = rng.choice(list(_EVENT_FIELDS), n, p=list(_EVENT_FIELDS.values()))
+    same = rng.random(n) < noop
+    events = []
+    for i in range(n):
+        f, c = field[i], who[i]
+        if same[i]: value = base[f][c]
+        elif f == 'tenure': value = float(base[f][c]) + 1
+        else: value = pool[f][i]
+        events.append({ID_COLUMN:base[ID_COLUMN][c], f:value.item() if hasattr(value, 'item') else value})
+    return pd.DataFrame(events)
+
+
+def bench(customers=100_000, events=50_000, batch_size=DEFAULT_BATCH, seed=0):
+    import tempfile
+    from .artifacts import load_for_scoring
+    from .synthetic import generate_customers
+    model, scaler = load_for_scoring()
+    base = generate_customers(customers, seed)
+    with tempfile.TemporaryDirectory() as tmp, ScoreStore(os.path.join(tmp, 'bench.db')) as store:
+        scorer = IncrementalScorer(store, model, scaler)
+        df = pd.DataFrame(base)
+        t = time.perf_counter()
+        scorer.load(df[i:i+batch_size] for i in range(0, len(df), batch_size))
+        load_seconds = time.perf_counter() - t
+        ev = _synthetic_events(base, events, seed)
+        stats = scorer.apply_stream(ev[i:i+batch_size] for i in range(0, len(ev), batch_size))
+    full = customers / load_seconds
+    return {'base_customers':customers, 'full_load_seconds':load_seconds, 'full_rows_per_sec':full, **stats}
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    from .artifacts import MODEL_PATH, MODELFILE_PATH, SCALER_PATH, fingerprint, load_for_scoring
+    p = argparse.ArgumentParser(prog='python -m retainiq.incremental', description='Incremental churn rescoring.')
+    sub = p.add_subparsers(dest='cmd', required=True)
+    for name in ('init', 'apply'):
+        s = sub.add_parser(name)
+        s.add_argument('input', help='customer file (init) or change events: .jsonl, CSV, Parquet, or - for stdin')
+        s.add_argument('--store', default=STORE_PATH)
+        s.add_argument('--batch-size', type=int, default=DEFAULT_BATCH)
+        s.add_argument('--model', default=MODEL_PATH)
+        s.add_argument('--scaler', default=SCALER_PATH)
+        s.add_argument('--modelfile', default=MODELFILE_PATH)
+        s.add_argument('--cube', help='portfolio cube (.npz) to keep up to date')
+    sub.choices['init'].add_argument('--replace', action='store_true', help='clear a non-empty store first')
+    sub.choices['apply'].add_argument('-o', '--output', help='write deltas here (CSV); default stdout')
+    b = sub.add_parser('bench')
+    b.add_argument('--customers', type=int, default=100_000)
+    b.add_argument('--events', type=int, default=50_000)
+    b.add_argument('--batch-size', type=int, default=DEFAULT_BATCH)
+    args = p.parse_args(argv)
+
+    if args.cmd == 'bench':
+        print(json.dumps(bench(args.customers, args.events, args.batch_size), indent=2))
+        return 0
+
+    model, scaler = load_for_scoring(args.model, args.scaler, args.modelfile)
+    model_fp = [list(f) for f in fingerprint(args.model, args.scaler, args.modelfile)]
+    cube = None
+    if args.cube:
+        from .cohorts import Cube
+        cube = Cube.load(args.cube) if args.cmd == 'apply' and os.path.exists(args.cube) else Cube()
+    with ScoreStore(args.store) as store:
+        scorer = IncrementalScorer(store, model, scaler, cube)
+        if args.cmd == 'init':
+            from .batch import iter_chunks
+            if len(store):
+                if not args.replace:
+                    sys.exit(f"{args.store} already holds {len(store):,} customers; pass --replace to start over")
+                store.clear()
+            start = time.perf_counter()
+            rows = scorer.load(iter_chunks(args.input, args.batch_size))
+            store.set_meta('model', model_fp)
+            if cube is not None: cube.save(args.cube)
+            print(f"stored {rows:,} customers in {time.perf_counter()-start:.2f}s", file=sys.stderr)
+            return 0
+        if store.get_meta('model') != model_fp:
+            print("warning: store was scored with different artifacts; re-run init for a full rescore", file=sys.stderr)
+        out = open(args.output, 'w') if args.output else sys.stdout
+        header = [True]
+
+        def write(deltas):
+            deltas.to_csv(out, header=header[0], index=False, float_format='%.4f')
+            header[0] = False
+            out.flush()
+        try:
+            stats = scorer.apply_stream(iter_events(args.input, args.batch_size), write)
+        finally:
+            if args.output: out.close()
+            if cube is not None: cube.save(args.cube)
+    print(json.dumps(stats), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""Model calls on encoded feature matrices."""
+import warnings
+
+
+def predict_proba(model, X):
+    """Churn probability (positive class) for each row of an encoded matrix.
+
+    The encoder produces bare arrays in ``FEATURE_NAMES`` order, so sklearn's
+    "fitted with feature names" warning is expected and silenced here.
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        return model.predict_proba(X)[:,1]
@@ -0,0 +1,59 @@
+"""Local load generator for the scoring service.
+
+Fires ``--requests`` single-customer calls at ``/score`` from ``--concurrency``
+parallel clients and reports client-side throughput and latency next to the
+server's own ``/stats``.
+
+    python -m retainiq.service &
+    python -m retainiq.loadtest --requests 5000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+import numpy as np
+
+from .synthetic import generate_records
+
+
+async def run(url, requests, concurrency):
+    customers = generate_records(min(requests, 1000))
+    latencies = []
+    counter = iter(range(requests))
+
+    async def client(session):
+        for i in counter:
+            t = time.perf_counter()
+            async with session.post(f'{url}/score', json=customers[i % len(customers)]) as resp:
+                resp.raise_for_status()
+                await resp.read()
+            latencies.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        async with session.get(f'{url}/stats') as resp:
+            server = await resp.json()
+    lat = np.array(latencies) * 1e3
+    return {
+        'requests':len(latencies), 'concurrency':concurrency, 'seconds':round(elapsed, 3),
+        'requests_per_sec':round(len(latencies)/elapsed, 1),
+        'latency_ms':dict(zip(('p50','p95','p99'), np.percentile(lat, [50,95,99]).round(3).tolist())),
+        'server':server,
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='python -m retainiq.loadtest', description='Load-test the scoring service.')
+    p.add_argument('--url', default='http://127.0.0.1:8000')
+    p.add_argument('--requests', type=int, default=2000)
+    p.add_argument('--concurrency', type=int, default=32)
+    args = p.parse_args(argv)
+    print(json.dumps(asyncio.run(run(args.url, args.requests, args.concurrency)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Lightweight hot-path instrumentation: stage timers and counters.
+
+Disabled by default; set ``RETAINIQ_METRICS=1`` (or call ``METRICS.enable()``)
+to record, and ``RETAINIQ_METRICS_FILE`` to have ``dump()`` write a JSON
+snapshot there for external scrapers. While disabled, ``timer()`` hands back
+one shared no-op context manager and ``count()`` returns immediately, so the
+instrumented code pays a function call and an attribute check per stage.
+
+    with METRICS.timer('predict'):
+        proba = predict_proba(model, X)
+    METRICS.count('model_loads')
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+import numpy as np
+
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram plus a window of recent samples for percentiles."""
+
+    def __init__(self, window=2048):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def summary(self):
+        ms = np.array(self.recent) * 1e3
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99]) if len(ms) else (0.0, 0.0, 0.0)
+        return {'count':self.count, 'mean_ms':self.total / self.count * 1e3 if self.count else 0.0,
+                'p50_ms':float(p50), 'p95_ms':float(p95), 'p99_ms':float(p99),
+                'buckets':dict(zip([*map(str, BUCKETS), '+Inf'], self.buckets))}
+
+
+class _NullTimer:
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NULL = _NullTimer()
+
+
+class Registry:
+    """Named histograms and counters, safe to share between threads."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._hist = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def enable(self, on=True):
+        self.enabled = on
+
+    def timer(self, name):
+        return _Timer(self, name) if self.enabled else _NULL
+
+    def observe(self, name, seconds):
+        with self._lock:
+            hist = self._hist.get(name)
+            if hist is None:
+                hist = self._hist[name] = Histogram()
+            hist.observe(seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self._hist.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {'enabled':self.enabled,
+                    'stages':{k:h.summary() for k,h in sorted(self._hist.items())},
+                    'counters':dict(sorted(self._counters.items()))}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def dump(self, path=None, extra=None):
+        """Atomically write the JSON snapshot (plus ``extra`` keys) to ``path`` or $RETAINIQ_METRICS_FILE."""
+        path = path or os.environ.get('RETAINIQ_METRICS_FILE')
+        if not path:
+            return
+        snap = self.snapshot()
+        snap.update(extra or {}, written=time.time())
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(snap, f)
+        os.replace(tmp, path)
+
+    def to_prometheus(self, prefix='retainiq'):
+        """Prometheus text exposition of every histogram and counter."""
+        lines = [f'# TYPE {prefix}_stage_seconds histogram']
+        with self._lock:
+            for name, h in sorted(self._hist.items()):
+                cumulative = 0
+                for le, n in zip([*map(str, BUCKETS), '+Inf'], h.buckets):
+                    cumulative += n
+                    lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {h.total}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {h.count}')
+            if self._counters:
+                lines.append(f'# TYPE {prefix}_events_total counter')
+            for name, n in sorted(self._counters.items()):
+                lines.append(f'{prefix}_events_total{{event="{name}"}} {n}')
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Registry(enabled=os.environ.get('RETAINIQ_METRICS', '') not in ('', '0'))
@@ -0,0 +1,206 @@
+"""Versioned, memory-mappable model file.
+
+``model.riq`` holds everything the scorer needs without unpickling: the
+flattened forest node arrays, the scaler's mean/scale, ``FEATURE_NAMES`` from
+``features.pkl`` and the forest's feature importances. Layout::
+
+    b'RIQM' | uint32 format version | uint64 header length | JSON header
+    | arrays, each starting on a 64-byte boundary
+
+The loader maps the file read-only, so every worker process that loads it
+shares the same page-cache pages instead of holding its own copy, and
+sklearn is not imported at all.
+
+    python -m retainiq.modelfile export             # model.pkl + scaler.pkl + features.pkl -> model.riq
+    python -m retainiq.modelfile bench              # cold start and RSS, pickle vs model.riq
+"""
+import argparse
+import json
+import os
+import pickle
+import struct
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from .artifacts import MODELFILE_PATH, file_sha256
+from .config import FEATURE_NAMES, NUM_FEATURES
+
+MAGIC = b'RIQM'
+FORMAT_VERSION = 1
+FEATURES_PATH = 'features.pkl'
+_PREFIX = struct.Struct('<4sIQ')
+_ALIGN = 64
+
+
+class ScalerStats:
+    """The two fitted attributes of ``StandardScaler`` the encoder reads."""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+
+class ModelFile:
+    """A loaded ``model.riq``: compiled forest, scaler stats and metadata."""
+
+    def __init__(self, forest, scaler, header):
+        self.forest = forest
+        self.scaler = scaler
+        self.header = header
+
+    @property
+    def feature_names(self):
+        return self.header['feature_names']
+
+
+def export(model, scaler, feature_names, path=MODELFILE_PATH, source=None):
+    """Write a fitted (or already compiled) forest and scaler to ``path`` in the model-file format."""
+    from .encoding import FeatureEncoder
+    from .forest import CompiledForest
+    if list(feature_names) != FEATURE_NAMES:
+        raise ValueError("features.pkl column order does not match FEATURE_NAMES")
+    stats = FeatureEncoder(scaler)   # mean/scale in NUM_FEATURES order, whatever order the scaler was fitted in
+    forest = model if isinstance(model, CompiledForest) else CompiledForest.from_sklearn(model)
+    arrays = {
+        'feature':forest.feature, 'threshold':forest.threshold, 'left':forest.left,
+        'right':forest.right, 'value':forest.value, 'roots':forest.roots,
+        'is_leaf':forest.is_leaf, 'classes':forest.classes_,
+        'scaler_mean':stats.mean, 'scaler_scale':stats.scale,
+    }
+    if hasattr(forest, 'feature_importances_'):   # compacted variants may have none
+        arrays['feature_importances'] = forest.feature_importances_
+    layout, offset = {}, 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        arrays[name] = arr
+        layout[name] = {'dtype':arr.dtype.str, 'shape':list(arr.shape), 'offset':offset}
+        offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+    header = {
+        'format_version':FORMAT_VERSION, 'model_type':forest.model_type,
+        'n_trees':forest.n_trees, 'n_nodes':int(len(forest.feature)),
+        'n_features':int(forest.n_features_in_), 'feature_names':list(feature_names),
+        'value_scale':float(forest.value_scale),
+        'num_features':NUM_FEATURES, 'created':time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'source':source or {}, 'arrays':layout,
+    }
+    raw = json.dumps(header).encode()
+    data_start = -(-(_PREFIX.size + len(raw)) // _ALIGN) * _ALIGN
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(raw)))
+        f.write(raw)
+        f.write(b'\0' * (data_start - f.tell()))
+        for name, arr in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(arr.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)   # readers never see a half-written file
+    return header
+
+
+def load(path=MODELFILE_PATH):
+    """Map ``path`` read-only and build the forest and scaler stats on top of it."""
+    from .forest import CompiledForest
+    with open(path, 'rb') as f:
+        magic, version, n = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a RetainIQ model file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {version}, this build reads {FORMAT_VERSION}")
+        header = json.loads(f.read(n))
+    if header['feature_names'] != FEATURE_NAMES:
+        raise ValueError(f"{path} was exported for a different feature layout")
+    data_start = -(-(_PREFIX.size + n) // _ALIGN) * _ALIGN
+    buf = np.memmap(path, dtype=np.uint8, mode='r')
+    a = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        start = data_start + spec['offset']
+        a[name] = buf[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+    forest = CompiledForest(a['feature'], a['threshold'], a['left'], a['right'], a['value'],
+                            a['roots'], a['classes'], header['n_features'], is_leaf=a['is_leaf'],
+                            feature_importances=a.get('feature_importances'), model_type=header['model_type'],
+                            value_scale=header.get('value_scale', 1.0))
+    return ModelFile(forest, ScalerStats(a['scaler_mean'], a['scaler_scale']), header)
+
+
+# ── Cold-Start Benchmark ──────────────────────────────────────────────────────
+_PROBE = r'''
+import json, sys, time
+t = time.perf_counter()
+mode, path, scaler_path = sys.argv[1:4]
+if mode == 'pickle':
+    import pickle
+    from retainiq.forest import compile_model
+    with open(path, 'rb') as f: model = pickle.load(f)
+    with open(scaler_path, 'rb') as f: scaler = pickle.load(f)
+    scorer = compile_model(model)
+else:
+    from retainiq.modelfile import load
+    mf = load(path); scorer, scaler = mf.forest, mf.scaler
+from retainiq.encoding import FeatureEncoder, _parity_sample
+FeatureEncoder(scaler).encode_columns(_parity_sample(1))
+loaded = time.perf_counter() - t
+import numpy as np
+scorer.predict_proba(np.zeros((1, scorer.n_features_in_), dtype=np.float32))
+rss = {l.split(':')[0]:int(l.split()[1]) for l in open('/proc/self/status') if l.startswith(('VmRSS', 'RssFile', 'RssAnon'))}
+print(json.dumps({'load_sec':loaded, 'first_predict_sec':time.perf_counter() - t - loaded,
+                  'rss_mb':rss.get('VmRSS', 0)/1024, 'rss_anon_mb':rss.get('RssAnon', 0)/1024,
+                  'rss_file_mb':rss.get('RssFile', 0)/1024, 'sklearn_imported':'sklearn' in sys.modules}))
+'''
+
+
+def probe(mode, path, scaler_path, repeats=3):
+    """Best-of-``repeats`` cold start of one artifact (``mode`` 'pickle' or 'modelfile') in fresh interpreters."""
+    env = dict(os.environ, PYTHONWARNINGS='ignore',
+               PYTHONPATH=os.pathsep.join([os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                           os.environ.get('PYTHONPATH', '')]))
+    runs = [json.loads(subprocess.run([sys.executable, '-c', _PROBE, mode, path, scaler_path],
+                                      check=True, capture_output=True, text=True, env=env).stdout)
+            for _ in range(repeats)]
+    return {k:(min(r[k] for r in runs) if k != 'sklearn_imported' else runs[0][k]) for k in runs[0]}
+
+
+def bench(model_path, scaler_path, modelfile_path, repeats=3):
+    """Cold-start time and memory in fresh interpreters, pickle vs model file.
+
+    ``rss_anon_mb`` is private to each process; ``rss_file_mb`` is page cache
+    shared with every other process mapping the same file.
+    """
+    return {mode:probe(mode, path, scaler_path, repeats)
+            for mode, path in (('pickle', model_path), ('modelfile', modelfile_path))}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='python -m retainiq.modelfile', description='Export or benchmark the model file.')
+    sub = p.add_subparsers(dest='cmd', required=True)
+    for name in ('export', 'bench'):
+        s = sub.add_parser(name)
+        s.add_argument('--model', default='model.pkl')
+        s.add_argument('--scaler', default='scaler.pkl')
+        s.add_argument('--output' if name == 'export' else '--modelfile', default=MODELFILE_PATH)
+    sub.choices['export'].add_argument('--features', default=FEATURES_PATH)
+    args = p.parse_args(argv)
+
+    if args.cmd == 'export':
+        from .artifacts import load_model, load_scaler
+        scaler = load_scaler(args.scaler)
+        if scaler is None:
+            sys.exit(f"error: could not load {args.scaler}")
+        with open(args.features, 'rb') as f:
+            features = pickle.load(f)
+        header = export(load_model(args.model), scaler, features, args.output,
+                        source={'model_sha256':file_sha256(args.model), 'scaler_sha256':file_sha256(args.scaler)})
+        size = os.path.getsize(args.output)
+        print(f"wrote {args.output}: {header['n_trees']} trees, {header['n_nodes']:,} nodes, "
+              f"{size/1e6:.1f} MB (model.pkl {os.path.getsize(args.model)/1e6:.1f} MB)")
+    else:
+        print(json.dumps(bench(args.model, args.scaler, args.modelfile), indent=2))
+
+
+if __name__ == '__main__':
+    main()
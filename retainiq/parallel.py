@@ -0,0 +1,191 @@
+"""Multi-process scoring of large customer files.
+
+The input is split into row ranges (line-aligned byte ranges for CSV, row
+groups for Parquet). A process pool scores the ranges, and each worker loads
+the model once in its initializer; a worker that cannot load it breaks the
+pool and fails the run instead of being respawned. With ``--backend compiled``
+and a ``model.riq`` on disk the workers memory-map one shared copy of the
+forest instead of each unpickling ``model.pkl``. Results are written back in
+input order.
+
+    python -m retainiq.parallel customers.csv scores.csv --workers 8
+    python -m retainiq.parallel customers.csv --bench 1,2,4,8
+
+CSV splitting assumes no quoted field spans a line break, which holds for the
+Telco export.
+"""
+import argparse
+import io
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from .artifacts import MODEL_PATH, MODELFILE_PATH, SCALER_PATH, load_for_scoring, load_model, load_scaler
+from .batch import ChunkWriter, _is_parquet, _unknown_summary, _usecols, score_frame
+from .config import CATEGORY_LEVELS, ID_COLUMN
+from .encoding import FeatureEncoder
+
+DEFAULT_RANGE_MB = 16
+
+# Per-process state set by _init_worker.
+_worker = {}
+
+
+# ── Input Splitting ───────────────────────────────────────────────────────────
+def split_csv(path, range_bytes):
+    """Line-aligned (start, end) byte ranges covering the data rows of a CSV."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        ranges = []
+        while start < size:
+            f.seek(min(start + range_bytes, size))
+            if f.tell() < size:
+                f.readline()
+            end = f.tell()
+            ranges.append(('csv', start, end))
+            start = end
+    return ranges
+
+
+def split_parquet(path):
+    import pyarrow.parquet as pq
+    return [('parquet', g, g + 1) for g in range(pq.ParquetFile(path).num_row_groups)]
+
+
+def split_input(path, range_bytes=DEFAULT_RANGE_MB * 1024**2):
+    return split_parquet(path) if _is_parquet(path) else split_csv(path, range_bytes)
+
+
+def read_range(path, task, columns):
+    kind, start, end = task
+    if kind == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).read_row_groups(list(range(start, end)), columns=columns).to_pandas()
+    names = pd.read_csv(path, nrows=0).columns.tolist()
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pd.read_csv(io.BytesIO(data), names=names, header=None, usecols=columns,
+                       dtype={ID_COLUMN:str}, na_values={'TotalCharges':[' ']})
+
+
+# ── Workers ───────────────────────────────────────────────────────────────────
+def _init_worker(path, backend, model_path, scaler_path, modelfile_path):
+    if backend == 'compiled':
+        model, scaler = load_for_scoring(model_path, scaler_path, modelfile_path)
+    else:
+        model, scaler = load_model(model_path), load_scaler(scaler_path)
+    _worker.update(path=path, model=model, scaler=scaler, columns=_usecols(path))
+
+
+def _score_range(task):
+    """Scores for one range, with that range's unknown-level counts."""
+    df = read_range(_worker['path'], task, _worker['columns'])
+    encoder = FeatureEncoder(_worker['scaler'])
+    return score_frame(_worker['model'], encoder, df), encoder.unknown_rows, encoder.unknown
+
+
+def score_file_parallel(input_path, output_path, workers=None, backend='sklearn',
+                        model_path=MODEL_PATH, scaler_path=SCALER_PATH, modelfile_path=MODELFILE_PATH,
+                        range_mb=DEFAULT_RANGE_MB, progress=None, strict=False):
+    """Score ``input_path`` with a pool of ``workers`` processes; output keeps input order.
+
+    Returns a dict with ``rows``, ``seconds``, ``rows_per_sec``, ``workers``,
+    ``unknown_rows`` and ``unknown`` as in ``retainiq.batch.score_file``;
+    ``strict`` raises on the first range with unknown category levels.
+    """
+    workers = workers or os.cpu_count()
+    needed = [model_path] if backend == 'sklearn' or not os.path.exists(modelfile_path) else [modelfile_path]
+    for path in [input_path, *needed]:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found")
+    tasks = split_input(input_path, int(range_mb * 1024**2))
+    rows = unknown_rows = 0
+    unknown = dict.fromkeys(CATEGORY_LEVELS, 0)
+    start = time.perf_counter()
+    ctx = mp.get_context('spawn')   # no fork-inherited copies of a parent-side model
+    # Unlike multiprocessing.Pool, the executor does not respawn a worker whose initializer raised.
+    pool = ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker,
+                               initargs=(input_path, backend, model_path, scaler_path, modelfile_path))
+    try:
+        with ChunkWriter(output_path) as writer:
+            for result, bad, counts in pool.map(_score_range, tasks):
+                if strict and bad:
+                    raise ValueError(f"rows {rows:,}-{rows+len(result)-1:,} have unknown category levels: "
+                                     f"{_unknown_summary(counts)}")
+                unknown_rows += bad
+                for col, n in counts.items():
+                    unknown[col] += n
+                writer.write(result)
+                rows += len(result)
+                if progress: progress(rows)
+    except BrokenProcessPool as e:
+        raise RuntimeError(f"a scoring worker failed to start or died: {e}") from e
+    finally:
+        pool.shutdown(cancel_futures=True)
+    seconds = time.perf_counter() - start
+    return {'rows':rows, 'seconds':seconds, 'rows_per_sec':rows/seconds if seconds else 0.0, 'workers':workers,
+            'unknown_rows':unknown_rows, 'unknown':unknown}
+
+
+def bench(input_path, worker_counts, **kwargs):
+    """Rows/sec and speed-up over one worker for each worker count (output discarded)."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, 'scores.parquet' if _is_parquet(input_path) else 'scores.csv')
+        for n in worker_counts:
+            stats = score_file_parallel(input_path, out, n, **kwargs)
+            stats['speedup'] = stats['rows_per_sec'] / results[0]['rows_per_sec'] if results else 1.0
+            results.append(stats)
+    return results
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='python -m retainiq.parallel', description='Score a customer file on several cores.')
+    p.add_argument('input', help='CSV or Parquet file with raw Telco columns')
+    p.add_argument('output', nargs='?', help='CSV or Parquet file to write scores to')
+    p.add_argument('--workers', type=int, default=os.cpu_count())
+    p.add_argument('--backend', choices=['sklearn','compiled'], default='sklearn',
+                   help='compiled memory-maps model.riq once for all workers')
+    p.add_argument('--model', default=MODEL_PATH)
+    p.add_argument('--scaler', default=SCALER_PATH)
+    p.add_argument('--modelfile', default=MODELFILE_PATH)
+    p.add_argument('--range-mb', type=float, default=DEFAULT_RANGE_MB, help='CSV bytes per task')
+    p.add_argument('--strict', action='store_true', help='fail on category values outside the known levels')
+    p.add_argument('--bench', metavar='N,N,...', help='benchmark these worker counts instead of writing output')
+    args = p.parse_args(argv)
+    opts = dict(backend=args.backend, model_path=args.model, scaler_path=args.scaler,
+                modelfile_path=args.modelfile, range_mb=args.range_mb)
+
+    if args.bench:
+        counts = [int(n) for n in args.bench.split(',')]
+        print(f"{'workers':>7} {'rows':>10} {'seconds':>8} {'rows/sec':>10} {'speedup':>7}")
+        for r in bench(args.input, counts, **opts):
+            print(f"{r['workers']:>7} {r['rows']:>10,} {r['seconds']:>8.2f} {r['rows_per_sec']:>10,.0f} {r['speedup']:>7.2f}")
+        print(f"({os.cpu_count()} cores available)")
+        return 0
+    if not args.output:
+        p.error('output is required unless --bench is given')
+    try:
+        stats = score_file_parallel(args.input, args.output, args.workers, strict=args.strict, **opts)
+    except (OSError, RuntimeError, ValueError) as e:
+        sys.exit(f"error: {e}")
+    print(f"scored {stats['rows']:,} rows in {stats['seconds']:.2f}s on {stats['workers']} workers "
+          f"({stats['rows_per_sec']:,.0f} rows/sec)", file=sys.stderr)
+    if stats['unknown_rows']:
+        print(f"warning: {stats['unknown_rows']:,} rows have unknown category levels, scored as the baseline level "
+              f"({_unknown_summary(stats['unknown'])})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
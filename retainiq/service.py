@@ -0,0 +1,251 @@
+"""HTTP scoring service with request micro-batching.
+
+Loads the model and scaler once and serves churn scores over HTTP without
+Streamlit. Concurrent single-customer requests are queued and scored together
+once ``max_batch`` requests are waiting or ``max_wait_ms`` has passed since the
+first one arrived, so many small calls share one model call.
+
+    python -m retainiq.service --port 8000 --max-batch 64 --max-wait-ms 2
+
+Endpoints:
+    POST /score        one customer object with the raw sidebar fields
+    POST /score/bulk   {"customers": [...]} or a bare list of customer objects
+    GET  /stats        request, batch and latency counters
+    GET  /metrics      per-stage timings in Prometheus format (RETAINIQ_METRICS=1)
+    GET  /health
+"""
+import argparse
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+from aiohttp import web
+
+from .artifacts import MODEL_PATH, MODELFILE_PATH, SCALER_PATH, load_for_scoring
+from .cache import PredictionCache
+from .config import RAW_COLUMNS, risk_band
+from .encoding import FeatureEncoder
+from .inference import predict_proba
+from .metrics import METRICS
+
+
+class Stats:
+    """Throughput and latency counters exposed on ``/stats``."""
+
+    def __init__(self, window=10_000):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window)   # seconds, most recent requests
+
+    def observe(self, seconds, rows=1):
+        self.requests += 1
+        self.rows += rows
+        self.latencies.append(seconds)
+
+    def snapshot(self):
+        uptime = time.perf_counter() - self.started
+        lat = np.array(self.latencies) * 1e3
+        pct = dict(zip(('p50_ms','p95_ms','p99_ms'), np.percentile(lat, [50,95,99]).round(3).tolist())) if len(lat) else {}
+        return {
+            'uptime_sec':round(uptime, 3), 'requests':self.requests, 'rows':self.rows,
+            'batches':self.batches, 'errors':self.errors,
+            'mean_batch_rows':round(self.rows/self.batches, 2) if self.batches else 0.0,
+            'rows_per_sec':round(self.rows/uptime, 1) if uptime else 0.0,
+            'latency':pct,
+        }
+
+
+class Scorer:
+    """Encoder plus model; turns raw customer dicts into score dicts."""
+
+    def __init__(self, model, scaler=None, cache=None):
+        self.model = model
+        self.encoder = FeatureEncoder(scaler)
+        self.cache = cache
+
+    def reload(self, model_path=MODEL_PATH, scaler_path=SCALER_PATH, modelfile_path=MODELFILE_PATH):
+        model, scaler = load_for_scoring(model_path, scaler_path, modelfile_path)
+        self.model, self.encoder = model, FeatureEncoder(scaler)
+
+    def score(self, records):
+        generation = None
+        if self.cache is not None:
+            self.cache.check()   # reloads artifacts rewritten on disk before the model is picked
+            generation = self.cache.generation
+        model, encoder = self.model, self.encoder
+        with METRICS.timer('encode'):
+            cols = {c:[r[c] for r in records] for c in RAW_COLUMNS}
+            X = encoder.encode_columns(cols)
+        with METRICS.timer('predict'):
+            proba = self.cache.predict_proba(model, X, generation) if self.cache else predict_proba(model, X)
+        bands = risk_band(proba)
+        return [{'churn_probability':float(p), 'risk_band':str(b), 'prediction':int(p > 0.5)}
+                for p,b in zip(proba, bands)]
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-record requests into small model calls."""
+
+    def __init__(self, scorer, stats, max_batch=64, max_wait_ms=2.0):
+        self.scorer = scorer
+        self.stats = stats
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try: await self._task
+            except asyncio.CancelledError: pass
+
+    async def submit(self, record):
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, fut))
+        return await fut
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0: break
+                try: batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError: break
+            records = [r for r,_ in batch]
+            try:
+                results = await loop.run_in_executor(None, self.scorer.score, records)
+            except Exception:
+                # One bad record must not fail the requests it was coalesced with.
+                results = await loop.run_in_executor(None, self._score_each, records)
+            self.stats.batches += 1
+            for (_,fut),res in zip(batch, results):
+                if fut.done(): continue
+                if isinstance(res, Exception):
+                    self.stats.errors += 1
+                    fut.set_exception(res)
+                else:
+                    fut.set_result(res)
+
+    def _score_each(self, records):
+        """Score records one at a time; a failing record yields its exception instead of a result."""
+        results = []
+        for record in records:
+            try: results.append(self.scorer.score([record])[0])
+            except Exception as e: results.append(e)
+        return results
+
+
+# ── HTTP Handlers ─────────────────────────────────────────────────────────────
+def _missing(record):
+    """Fields that are absent or not a single JSON scalar."""
+    if not isinstance(record, dict):
+        return ['<customer must be a JSON object>']
+    return [c for c in RAW_COLUMNS if c not in record or isinstance(record[c], (list, dict))]
+
+
+async def _json(request):
+    try: return await request.json()
+    except ValueError: raise web.HTTPBadRequest(text='request body is not valid JSON')
+
+
+async def score_one(request):
+    start = time.perf_counter()
+    app = request.app
+    record = await _json(request)
+    missing = _missing(record)
+    if missing:
+        app['stats'].errors += 1
+        return web.json_response({'error':'missing or invalid fields', 'fields':missing}, status=400)
+    result = await app['batcher'].submit(record)
+    app['stats'].observe(time.perf_counter() - start)
+    return web.json_response(result)
+
+
+async def score_bulk(request):
+    start = time.perf_counter()
+    app = request.app
+    body = await _json(request)
+    records = body.get('customers') if isinstance(body, dict) else body
+    if not isinstance(records, list):
+        app['stats'].errors += 1
+        return web.json_response({'error':'expected a list of customers'}, status=400)
+    for i,r in enumerate(records):
+        missing = _missing(r)
+        if missing:
+            app['stats'].errors += 1
+            return web.json_response({'error':'missing or invalid fields', 'index':i, 'fields':missing}, status=400)
+    # Bulk payloads are already batched; score them directly off the event loop.
+    results = await asyncio.get_running_loop().run_in_executor(None, app['scorer'].score, records) if records else []
+    app['stats'].batches += 1
+    app['stats'].observe(time.perf_counter() - start, rows=len(records))
+    return web.json_response({'scores':results})
+
+
+async def stats(request):
+    snapshot = request.app['stats'].snapshot()
+    cache = request.app['scorer'].cache
+    if cache is not None:
+        snapshot['cache'] = cache.stats()
+    return web.json_response(snapshot)
+
+
+async def metrics(request):
+    """Stage histograms and counters in Prometheus text format (RETAINIQ_METRICS=1)."""
+    return web.Response(text=METRICS.to_prometheus(), content_type='text/plain')
+
+
+async def health(request):
+    return web.json_response({'status':'ok'})
+
+
+def create_app(model, scaler=None, max_batch=64, max_wait_ms=2.0, cache=None):
+    app = web.Application(client_max_size=64 * 1024**2)
+    app['stats']   = Stats()
+    app['scorer']  = Scorer(model, scaler, cache)
+    app['batcher'] = MicroBatcher(app['scorer'], app['stats'], max_batch, max_wait_ms)
+
+    async def on_startup(app): app['batcher'].start()
+    async def on_cleanup(app): await app['batcher'].stop()
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_post('/score', score_one)
+    app.router.add_post('/score/bulk', score_bulk)
+    app.router.add_get('/stats', stats)
+    app.router.add_get('/metrics', metrics)
+    app.router.add_get('/health', health)
+    return app
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='python -m retainiq.service', description='Serve churn scores over HTTP.')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8000)
+    p.add_argument('--model', default=MODEL_PATH)
+    p.add_argument('--scaler', default=SCALER_PATH)
+    p.add_argument('--modelfile', default=MODELFILE_PATH, help='memory-mapped model file, used when newer than --model')
+    p.add_argument('--max-batch', type=int, default=64, help='largest micro-batch of single requests')
+    p.add_argument('--max-wait-ms', type=float, default=2.0, help='how long the first queued request waits for company')
+    p.add_argument('--cache-size', type=int, default=10_000, help='memoised predictions to keep (0 disables)')
+    args = p.parse_args(argv)
+    paths = (args.model, args.scaler, args.modelfile)
+    cache = PredictionCache(args.cache_size, paths) if args.cache_size else None
+    app = create_app(*load_for_scoring(*paths), args.max_batch, args.max_wait_ms, cache)
+    if cache is not None:
+        # Retrained artifacts on disk are reloaded on the next request.
+        cache.on_invalidate = lambda: app['scorer'].reload(*paths)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
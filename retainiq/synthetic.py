@@ -0,0 +1,50 @@
+"""Synthetic customers with the raw Telco schema.
+
+Used by the benchmarks and load tests. The columns follow the dataset's own
+dependencies: customers without phone service have no multiple lines,
+customers without internet have no add-ons, and ``TotalCharges`` follows
+tenure times ``MonthlyCharges``.
+"""
+import numpy as np
+
+from .config import CATEGORY_LEVELS, ID_COLUMN, RAW_COLUMNS
+
+_ADDONS = ['OnlineSecurity','OnlineBackup','DeviceProtection','TechSupport','StreamingTV','StreamingMovies']
+
+
+def generate_customers(n, seed=0, with_id=True):
+    """``n`` random customers as a dict of NumPy columns (raw values, as the sidebar collects them)."""
+    rng = np.random.default_rng(seed)
+    yes_no = np.array(['No','Yes'])
+
+    def flag(p):
+        return yes_no[(rng.random(n) < p).astype(np.int8)]
+
+    cols = {
+        'gender':rng.choice(CATEGORY_LEVELS['gender'], n),
+        'SeniorCitizen':flag(0.16), 'Partner':flag(0.48), 'Dependents':flag(0.30),
+        'tenure':rng.integers(0, 73, n).astype(np.float64),
+        'PhoneService':flag(0.90),
+        'InternetService':rng.choice(CATEGORY_LEVELS['InternetService'], n, p=[0.34,0.44,0.22]),
+        'Contract':rng.choice(CATEGORY_LEVELS['Contract'], n, p=[0.55,0.21,0.24]),
+        'PaperlessBilling':flag(0.59),
+        'PaymentMethod':rng.choice(CATEGORY_LEVELS['PaymentMethod'], n, p=[0.22,0.22,0.34,0.22]),
+    }
+    cols['MultipleLines'] = np.where(cols['PhoneService'] == 'Yes', flag(0.45), 'No')
+    online = cols['InternetService'] != 'No'
+    for c in _ADDONS:
+        cols[c] = np.where(online, flag(0.40), 'No')
+    base = np.where(cols['InternetService'] == 'Fiber optic', 70.0, np.where(online, 45.0, 20.0))
+    cols['MonthlyCharges'] = (base + rng.uniform(0, 40, n)).round(2)
+    cols['TotalCharges'] = (cols['MonthlyCharges'] * np.maximum(cols['tenure'], 1) * rng.uniform(0.9, 1.1, n)).round(2)
+    out = {c:cols[c] for c in RAW_COLUMNS}
+    if with_id:
+        out = {ID_COLUMN:np.char.add('SYN-', np.arange(n).astype(str)), **out}
+    return out
+
+
+def generate_records(n, seed=0):
+    """The same customers as a list of plain dicts, e.g. for JSON payloads."""
+    cols = generate_customers(n, seed, with_id=False)
+    lists = {c:v.tolist() for c,v in cols.items()}
+    return [{c:lists[c][i] for c in RAW_COLUMNS} for i in range(n)]
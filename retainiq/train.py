@@ -0,0 +1,244 @@
+"""Reproducible training pipeline for the churn model.
+
+Replaces the feature-engineering and model-building notebooks with one
+scripted run:
+
+1. The cleaned dataset is encoded once into the ``FEATURE_NAMES`` layout with
+   the same ``FeatureEncoder`` the app uses (numeric columns left unscaled)
+   and cached as one array per column under ``--cache-dir``, keyed by the
+   dataset's SHA-256. Later runs on the same file skip parsing and encoding.
+2. The notebooks' stratified 80/20 split (``random_state=42``); the scaler is
+   fitted on the training rows in ``NUM_FEATURES`` order.
+3. LogisticRegression and RandomForest candidates are cross-validated in
+   parallel, one (candidate, fold) fit per worker.
+4. The best candidate is refitted on the training split; a decision-threshold
+   sweep on its out-of-fold probabilities and held-out test metrics go into
+   the manifest.
+5. ``model.pkl``, ``scaler.pkl``, ``features.pkl`` and ``manifest.json`` are
+   written together; the manifest pins column order, scaler statistics,
+   dataset hash and library versions.
+
+    python -m retainiq.train data/Cleaned-dataset.csv --out-dir . --jobs -1
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .artifacts import file_sha256
+from .config import FEATURE_NAMES, HIGH_RISK, MEDIUM_RISK, NUM_FEATURES
+from .encoding import FeatureEncoder, _to_float
+
+DATA_PATH = "data/Cleaned-dataset.csv"
+CACHE_DIR = ".riq-cache"
+TARGET = 'Churn'
+TEST_SIZE = 0.2
+SEED = 42
+THRESHOLDS = np.round(np.arange(0.20, 0.71, 0.05), 2)
+
+# (name, estimator class, params); RandomForest keeps the notebook's settings as the first entry.
+CANDIDATES = [
+    *[('logreg', 'LogisticRegression', {'C':C, 'class_weight':cw, 'max_iter':1000})
+      for C in (0.01, 0.1, 1.0, 10.0) for cw in (None, 'balanced')],
+    *[('forest', 'RandomForestClassifier', {'n_estimators':200, 'max_depth':d, 'min_samples_leaf':leaf,
+                                            'class_weight':'balanced', 'random_state':SEED})
+      for d in (None, 12, 8) for leaf in (1, 5)],
+]
+
+
+# ── Feature Store ─────────────────────────────────────────────────────────────
+class _Identity:
+    """Scaler stand-in that leaves numeric columns unscaled."""
+    mean_  = np.zeros(len(NUM_FEATURES))
+    scale_ = np.ones(len(NUM_FEATURES))
+
+
+def _target(values):
+    if values.dtype.kind in 'biuf':
+        return values.astype(np.int8)
+    return (values.astype(str) == 'Yes').astype(np.int8)
+
+
+def encode_dataset(path):
+    """(unscaled feature matrix float64, target int8) from a cleaned Telco CSV."""
+    df = pd.read_csv(path, na_values={'TotalCharges':[' ']})
+    X = FeatureEncoder(_Identity()).encode_columns(df).astype(np.float64)
+    # float64 numerics; the float32 encoder output would round TotalCharges before the scaler sees it.
+    for col in NUM_FEATURES:
+        X[:, FEATURE_NAMES.index(col)] = _to_float(df[col])
+    return X, _target(df[TARGET].to_numpy())
+
+
+def load_features(path, cache_dir=CACHE_DIR):
+    """Encoded dataset from the column store, building it on first use; returns (X, y, info)."""
+    digest = file_sha256(path)
+    store = os.path.join(cache_dir, f'features-{digest[:16]}.npz')
+    info = {'path':path, 'sha256':digest, 'store':store, 'cached':os.path.exists(store)}
+    if info['cached']:
+        with np.load(store) as z:
+            if list(z['feature_names']) == FEATURE_NAMES:
+                X = np.column_stack([z[f'col_{i}'] for i in range(len(FEATURE_NAMES))])
+                return X, z['target'], info
+        info['cached'] = False   # layout changed since the store was written
+    X, y = encode_dataset(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = store + '.tmp.npz'
+    np.savez(tmp, feature_names=np.array(FEATURE_NAMES), target=y,
+             **{f'col_{i}':np.ascontiguousarray(X[:, i]) for i in range(X.shape[1])})
+    os.replace(tmp, store)
+    return X, y, info
+
+
+def scale(X, scaler):
+    """Apply ``scaler`` to the numeric columns and cast like the encoder does at inference."""
+    X = X.copy()
+    idx = [FEATURE_NAMES.index(c) for c in NUM_FEATURES]
+    stats = FeatureEncoder(scaler)   # scaler statistics in NUM_FEATURES order
+    X[:, idx] = (X[:, idx] - stats.mean) / stats.scale
+    return X.astype(np.float32)
+
+
+# ── Search ────────────────────────────────────────────────────────────────────
+def _estimator(kind, params):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    return {'LogisticRegression':LogisticRegression, 'RandomForestClassifier':RandomForestClassifier}[kind](**params)
+
+
+def _fit_fold(kind, params, X, y, train_idx, test_idx):
+    model = _estimator(kind, params).fit(X[train_idx], y[train_idx])
+    return test_idx, model.predict_proba(X[test_idx])[:, 1]
+
+
+def search(X, y, candidates=CANDIDATES, folds=5, jobs=-1):
+    """Cross-validate every candidate in parallel; returns rows sorted by mean AUC with OOF probabilities."""
+    from joblib import Parallel, delayed
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import StratifiedKFold
+    splits = list(StratifiedKFold(folds, shuffle=True, random_state=SEED).split(X, y))
+    tasks = [(c, s) for c in range(len(candidates)) for s in range(folds)]
+    out = Parallel(n_jobs=jobs)(delayed(_fit_fold)(candidates[c][1], candidates[c][2], X, y, *splits[s])
+                                for c, s in tasks)
+    rows = []
+    for c, (name, kind, params) in enumerate(candidates):
+        oof = np.empty(len(y))
+        aucs = []
+        for (ci, _), (test_idx, proba) in zip(tasks, out):
+            if ci == c:
+                oof[test_idx] = proba
+                aucs.append(roc_auc_score(y[test_idx], proba))
+        rows.append({'name':name, 'model':kind, 'params':params, 'cv_auc':float(np.mean(aucs)),
+                     'cv_auc_std':float(np.std(aucs)), 'oof':oof})
+    return sorted(rows, key=lambda r: -r['cv_auc'])
+
+
+def threshold_table(y, proba, thresholds=THRESHOLDS):
+    from sklearn.metrics import f1_score, precision_score, recall_score
+    rows = []
+    for t in thresholds:
+        pred = (proba >= t).astype(np.int8)
+        rows.append({'threshold':float(t), 'precision':float(precision_score(y, pred, zero_division=0)),
+                     'recall':float(recall_score(y, pred)), 'f1':float(f1_score(y, pred))})
+    return rows
+
+
+def evaluate(model, X, y):
+    from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
+    proba = model.predict_proba(X)[:, 1]
+    pred = (proba > 0.5).astype(np.int8)
+    return {'accuracy':float(accuracy_score(y, pred)), 'precision':float(precision_score(y, pred, zero_division=0)),
+            'recall':float(recall_score(y, pred)), 'roc_auc':float(roc_auc_score(y, proba)),
+            f'recall_at_{MEDIUM_RISK}':float(recall_score(y, proba >= MEDIUM_RISK)),
+            f'precision_at_{HIGH_RISK}':float(precision_score(y, proba >= HIGH_RISK, zero_division=0))}
+
+
+# ── Pipeline ──────────────────────────────────────────────────────────────────
+def _write(path, data, binary=True):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb' if binary else 'w') as f:
+        pickle.dump(data, f) if binary else json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def run(data_path=DATA_PATH, out_dir='.', cache_dir=CACHE_DIR, folds=5, jobs=-1, candidates=CANDIDATES, log=print):
+    import sklearn
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    timings = {}
+    t = time.perf_counter()
+    X_raw, y, data = load_features(data_path, cache_dir)
+    timings['features'] = time.perf_counter() - t
+    log(f"features: {len(y):,} rows from {'cache' if data['cached'] else 'CSV'} in {timings['features']:.2f}s")
+
+    idx_train, idx_test = train_test_split(np.arange(len(y)), test_size=TEST_SIZE, random_state=SEED, stratify=y)
+    num_idx = [FEATURE_NAMES.index(c) for c in NUM_FEATURES]
+    scaler = StandardScaler().fit(pd.DataFrame(X_raw[idx_train][:, num_idx], columns=NUM_FEATURES))
+    X_train, X_test = scale(X_raw[idx_train], scaler), scale(X_raw[idx_test], scaler)
+    y_train, y_test = y[idx_train], y[idx_test]
+
+    t = time.perf_counter()
+    results = search(X_train, y_train, candidates, folds, jobs)
+    timings['search'] = time.perf_counter() - t
+    log(f"search: {len(candidates)} candidates x {folds} folds in {timings['search']:.1f}s")
+    for r in results:
+        log(f"  {r['cv_auc']:.4f} ± {r['cv_auc_std']:.4f}  {r['model']} {r['params']}")
+
+    best = results[0]
+    t = time.perf_counter()
+    model = _estimator(best['model'], best['params']).fit(pd.DataFrame(X_train, columns=FEATURE_NAMES), y_train)
+    timings['refit'] = time.perf_counter() - t
+    if hasattr(model, 'n_jobs'):
+        model.n_jobs = None   # the app scores single rows; no worker pool per call
+    thresholds = threshold_table(y_train, best['oof'])
+    metrics = evaluate(model, pd.DataFrame(X_test, columns=FEATURE_NAMES), y_test)
+    log(f"test: " + ', '.join(f"{k} {v:.4f}" for k, v in metrics.items()))
+
+    manifest = {
+        'created':time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'dataset':{'path':data_path, 'sha256':data['sha256'], 'rows':int(len(y)),
+                   'churn_rate':float(y.mean()), 'train_rows':int(len(idx_train)), 'test_rows':int(len(idx_test))},
+        'feature_names':FEATURE_NAMES, 'num_features':NUM_FEATURES,
+        'scaler':{'mean':scaler.mean_.tolist(), 'scale':scaler.scale_.tolist()},
+        'model':{'type':best['model'], 'params':best['params'], 'cv_auc':best['cv_auc']},
+        'search':[{k:v for k, v in r.items() if k != 'oof'} for r in results],
+        'thresholds':{'oof':thresholds, 'best_f1':max(thresholds, key=lambda r: r['f1'])['threshold'],
+                      'risk_bands':[MEDIUM_RISK, HIGH_RISK]},
+        'test_metrics':metrics, 'timings_sec':timings,
+        'versions':{'python':platform.python_version(), 'numpy':np.__version__,
+                    'pandas':pd.__version__, 'sklearn':sklearn.__version__},
+        'cpu_count':os.cpu_count(),
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    _write(os.path.join(out_dir, 'model.pkl'), model)
+    _write(os.path.join(out_dir, 'scaler.pkl'), scaler)
+    _write(os.path.join(out_dir, 'features.pkl'), list(FEATURE_NAMES))
+    _write(os.path.join(out_dir, 'manifest.json'), manifest, binary=False)
+    return manifest
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='python -m retainiq.train', description='Train and export the churn model.')
+    p.add_argument('data', nargs='?', default=DATA_PATH, help='cleaned Telco CSV with a Churn column')
+    p.add_argument('--out-dir', default='.', help='where model.pkl, scaler.pkl, features.pkl and manifest.json go')
+    p.add_argument('--cache-dir', default=CACHE_DIR, help='encoded feature store')
+    p.add_argument('--folds', type=int, default=5)
+    p.add_argument('--jobs', type=int, default=-1, help='parallel fits (-1: all cores)')
+    p.add_argument('--only', choices=['logreg','forest'], help='restrict the search to one model family')
+    args = p.parse_args(argv)
+    if not os.path.exists(args.data):
+        sys.exit(f"{args.data} not found")
+    candidates = [c for c in CANDIDATES if args.only in (None, c[0])]
+    run(args.data, args.out_dir, args.cache_dir, args.folds, args.jobs, candidates,
+        log=lambda msg: print(msg, file=sys.stderr))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
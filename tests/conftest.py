@@ -0,0 +1,39 @@
+"""Shared fixtures: synthetic customers and a small forest fitted on them.
+
+Nothing here reads the trained artifacts in the repo root, so the suite runs
+on a fresh checkout.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from retainiq.config import FEATURE_NAMES, NUM_FEATURES
+from retainiq.synthetic import generate_customers
+
+
+@pytest.fixture(scope='session')
+def customers():
+    return generate_customers(2000, seed=1, with_id=False)
+
+
+@pytest.fixture(scope='session')
+def scaler(customers):
+    from sklearn.preprocessing import StandardScaler
+    return StandardScaler().fit(pd.DataFrame({c:customers[c] for c in NUM_FEATURES}))
+
+
+@pytest.fixture(scope='session')
+def X(customers, scaler):
+    from retainiq.encoding import FeatureEncoder
+    return FeatureEncoder(scaler).encode_columns(customers)
+
+
+@pytest.fixture(scope='session')
+def forest(X):
+    from sklearn.ensemble import RandomForestClassifier
+    rng = np.random.default_rng(0)
+    # Churn-like target: month-to-month, short tenure and fiber push it up.
+    logit = (-1.0 - X[:, FEATURE_NAMES.index('tenure')] + X[:, FEATURE_NAMES.index('InternetService_Fiber optic')]
+             - X[:, FEATURE_NAMES.index('Contract_Two year')] + rng.normal(0, 0.5, len(X)))
+    y = (logit > -0.8).astype(int)
+    return RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0).fit(X, y)
@@ -0,0 +1,38 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from retainiq.artifacts import file_sha256, load_for_scoring
+from retainiq.config import FEATURE_NAMES, NUM_FEATURES
+from retainiq.forest import CompiledForest
+from retainiq.modelfile import export
+
+
+@pytest.fixture
+def exported(tmp_path, forest, scaler):
+    paths = (str(tmp_path / 'model.pkl'), str(tmp_path / 'scaler.pkl'), str(tmp_path / 'model.riq'))
+    for path, obj in zip(paths, (forest, scaler)):
+        with open(path, 'wb') as f:
+            pickle.dump(obj, f)
+    export(forest, scaler, FEATURE_NAMES, paths[2], source={'scaler_sha256':file_sha256(paths[1])})
+    return paths
+
+
+def test_model_file_is_used_when_current(exported, scaler):
+    model, stats = load_for_scoring(*exported)
+    assert isinstance(model, CompiledForest) and not hasattr(model, 'estimators_')
+    assert np.allclose(stats.mean_, scaler.mean_)
+
+
+def test_rewritten_scaler_falls_back_to_pickles(exported, customers):
+    refit = StandardScaler().fit(pd.DataFrame({c:np.asarray(customers[c]) * 4 for c in NUM_FEATURES}))
+    with open(exported[1], 'wb') as f:
+        pickle.dump(refit, f)
+    os.utime(exported[1], (0, 0))   # older than model.riq: only the hash can tell
+    with pytest.warns(UserWarning, match='changed after'):
+        _, stats = load_for_scoring(*exported)
+    assert np.allclose(stats.mean_, refit.mean_)
@@ -0,0 +1,71 @@
+import os
+import pickle
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from retainiq.artifacts import load_for_scoring
+from retainiq.cache import PredictionCache
+from retainiq.config import RAW_COLUMNS
+from retainiq.inference import predict_proba
+from retainiq.service import Scorer
+
+
+def _write(path, obj, bump=0):
+    with open(path, 'wb') as f:
+        pickle.dump(obj, f)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump))
+
+
+def _artifacts(tmp_path, model, scaler):
+    paths = (str(tmp_path / 'model.pkl'), str(tmp_path / 'scaler.pkl'), str(tmp_path / 'model.riq'))
+    _write(paths[0], model)
+    _write(paths[1], scaler)
+    return paths
+
+
+def _retrained(X):
+    y = (X[:, 0] + X[:, 3] > 0).astype(int)   # unrelated target, so every score moves
+    return RandomForestClassifier(n_estimators=10, max_depth=6, random_state=1).fit(X, y)
+
+
+def test_hits_and_eviction(forest, X):
+    cache = PredictionCache(maxsize=50, paths=())
+    first = cache.predict_proba(forest, X[:40])
+    assert np.allclose(first, predict_proba(forest, X[:40]))
+    assert np.array_equal(cache.predict_proba(forest, X[:40]), first)
+    assert cache.stats()['hits'] == 40 and cache.stats()['misses'] == 40
+    cache.predict_proba(forest, X[40:80])
+    assert cache.stats()['size'] == 50 and cache.stats()['evictions'] == 30
+
+
+def test_scorer_serves_new_model_after_swap(tmp_path, forest, scaler, customers, X):
+    paths = _artifacts(tmp_path, forest, scaler)
+    cache = PredictionCache(1000, paths)
+    scorer = Scorer(*load_for_scoring(*paths), cache)
+    cache.on_invalidate = lambda: scorer.reload(*paths)
+    records = [{c:customers[c][i] for c in RAW_COLUMNS} for i in range(30)]
+
+    old = [r['churn_probability'] for r in scorer.score(records)]
+    assert np.allclose(old, predict_proba(forest, X[:30]))
+
+    retrained = _retrained(X)
+    _write(paths[0], retrained, bump=10**9)
+    expected = predict_proba(retrained, X[:30])
+    assert not np.allclose(old, expected)
+    for _ in range(2):   # the first call reloads, the second is served from the cache
+        assert np.allclose([r['churn_probability'] for r in scorer.score(records)], expected)
+    assert cache.stats()['invalidations'] == 1 and cache.stats()['hits'] == 30
+
+
+def test_stale_generation_is_not_stored(tmp_path, forest, scaler, X):
+    paths = _artifacts(tmp_path, forest, scaler)
+    cache = PredictionCache(1000, paths)
+    generation = cache.generation
+    _write(paths[0], _retrained(X), bump=10**9)
+    assert cache.check()
+    # A request that picked the old model before the swap still gets its answer ...
+    assert np.allclose(cache.predict_proba(forest, X[:10], generation), predict_proba(forest, X[:10]))
+    # ... but does not leave it in the cache for the next one.
+    assert cache.stats()['size'] == 0
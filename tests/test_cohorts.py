@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from retainiq.cohorts import DIMENSIONS, TENURE_EDGES, TENURE_LABELS, Cube
+from retainiq.config import risk_band
+
+
+@pytest.fixture(scope='module')
+def scored(customers):
+    proba = np.random.default_rng(2).random(len(customers['tenure']))
+    df = pd.DataFrame(customers)
+    df['proba'] = proba
+    df['tenure_bucket'] = pd.cut(df['tenure'], TENURE_EDGES + [np.inf], right=False, labels=TENURE_LABELS)
+    df['risk_band'] = risk_band(proba)
+    df['revenue_at_risk'] = df['MonthlyCharges'] * proba
+    return df
+
+
+def _expected(df, by):
+    g = df.groupby(by, observed=True)
+    out = pd.DataFrame({'customers':g.size(), 'churn_rate':g['proba'].mean(),
+                        'monthly_revenue':g['MonthlyCharges'].sum(), 'revenue_at_risk':g['revenue_at_risk'].sum()})
+    out['risk_share'] = out['revenue_at_risk'] / out['monthly_revenue']
+    return out
+
+
+@pytest.mark.parametrize('by', [['Contract'], ['Contract', 'tenure_bucket'], ['risk_band', 'InternetService'],
+                                ['SeniorCitizen', 'PaymentMethod', 'Contract'],
+                                ['gender', 'Partner', 'Dependents', 'PaperlessBilling']])
+def test_group_matches_groupby(scored, by):
+    cube = Cube()
+    cube.add(scored, scored['proba'].to_numpy())
+    got = cube.group(by)
+    exp = _expected(scored, by)
+    exp.index = exp.index.set_names(by)
+    got = got.reset_index().astype({d:str for d in by}).set_index(by).sort_index()
+    exp = exp.reset_index().astype({d:str for d in by}).set_index(by).sort_index()
+    pd.testing.assert_frame_equal(got, exp, check_dtype=False)
+
+
+def test_filters_and_remove(scored):
+    cube = Cube()
+    cube.add(scored, scored['proba'].to_numpy())
+    sub = scored[scored['InternetService'] == 'Fiber optic']
+    got = cube.group(['Contract'], InternetService='Fiber optic')
+    assert got['customers'].sum() == len(sub)
+    assert np.isclose(got['revenue_at_risk'].sum(), sub['revenue_at_risk'].sum())
+    cube.remove(sub, sub['proba'].to_numpy())
+    assert cube.customers == len(scored) - len(sub)
+    assert cube.group(['Contract'], InternetService='Fiber optic').empty
+
+
+def test_save_load_roundtrip(scored, tmp_path):
+    cube = Cube()
+    cube.add(scored, scored['proba'].to_numpy())
+    cube.save(tmp_path / 'portfolio.npz')
+    loaded = Cube.load(tmp_path / 'portfolio.npz')
+    for name in cube.data:
+        assert np.array_equal(cube.data[name], loaded.data[name])
+    assert list(DIMENSIONS) == list(cube.group(list(DIMENSIONS)).index.names)
+
+
+def test_missing_flags_are_skipped():
+    cols = {'Contract':['One year'] * 4, 'InternetService':['DSL'] * 4, 'PaymentMethod':['Mailed check'] * 4,
+            'gender':['Male'] * 4, 'SeniorCitizen':np.array([1.0, 0.0, np.nan, 1.0]),
+            'Partner':['Yes', 'No', 'No', None], 'Dependents':['No'] * 4, 'PaperlessBilling':['1', '0', 'No', 'Yes'],
+            'tenure':[3.0] * 4, 'MonthlyCharges':[50.0] * 4}
+    cube = Cube()
+    assert cube.add(cols, np.full(4, 0.5)) == 2
+    assert cube.skipped == 2
+    assert list(cube.group(['SeniorCitizen'])['customers']) == [1, 1]
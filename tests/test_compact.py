@@ -0,0 +1,32 @@
+import numpy as np
+
+from retainiq.compact import quantize, rebuild, tree_importances
+from retainiq.forest import CompiledForest
+from retainiq.inference import predict_proba
+
+
+def test_lossless_compaction(forest, X):
+    compiled = CompiledForest.from_sklearn(forest)
+    rebuilt = rebuild(compiled)
+    assert np.allclose(rebuilt.predict_proba(X)[:, 1], predict_proba(forest, X))
+    # float32 thresholds rounded down select the same leaves for float32 input.
+    assert np.array_equal(quantize(rebuilt).leaves(X), rebuilt.leaves(X))
+
+
+def test_importances_follow_selected_trees(forest):
+    assert np.allclose(tree_importances(forest), forest.feature_importances_)
+    trees = [3, 7, 11]
+    expected = np.mean([forest.estimators_[t].feature_importances_ for t in trees], axis=0)
+    subset = rebuild(CompiledForest.from_sklearn(forest), trees, feature_importances=tree_importances(forest, trees))
+    assert np.allclose(quantize(subset).feature_importances_, expected / expected.sum())
+    assert not hasattr(rebuild(CompiledForest.from_sklearn(forest), trees, max_depth=3), 'feature_importances_')
+
+
+def test_modelfile_without_importances(forest, scaler, X, tmp_path):
+    from retainiq.config import FEATURE_NAMES
+    from retainiq.modelfile import export, load
+    capped = rebuild(CompiledForest.from_sklearn(forest), max_depth=3)
+    export(capped, scaler, FEATURE_NAMES, str(tmp_path / 'capped.riq'))
+    mf = load(str(tmp_path / 'capped.riq'))
+    assert not hasattr(mf.forest, 'feature_importances_')
+    assert np.allclose(mf.forest.predict_proba(X), capped.predict_proba(X))
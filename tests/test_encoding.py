@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from retainiq.config import FEATURE_NAMES, NUM_FEATURES, RAW_COLUMNS
+from retainiq.encoding import FeatureEncoder, check_parity
+
+
+def test_parity_with_app_and_notebook(scaler):
+    assert check_parity(scaler) == []
+
+
+def test_records_match_columns(customers, scaler):
+    enc = FeatureEncoder(scaler)
+    records = [{c:customers[c][i] for c in RAW_COLUMNS} for i in range(50)]
+    single = np.vstack([enc.encode_record(r) for r in records])
+    assert np.array_equal(single, enc.encode_columns(customers)[:50])
+
+
+@pytest.mark.parametrize('value', [np.nan, None, '', ' ', 'n/a'])
+def test_missing_numbers_match_columns(customers, scaler, value):
+    enc = FeatureEncoder(scaler)
+    records = [{c:customers[c][i] for c in RAW_COLUMNS} for i in range(3)]
+    records[1]['TotalCharges'] = value
+    cols = pd.DataFrame(records)
+    single = np.vstack([enc.encode_record(r) for r in records])
+    assert not np.isnan(single).any()
+    assert np.array_equal(single, enc.encode_columns(cols))
+
+
+def test_reordered_scaler(customers, scaler):
+    shuffled = ['tenure', 'TotalCharges', 'MonthlyCharges']
+    other = StandardScaler().fit(pd.DataFrame({c:customers[c] for c in shuffled}))
+    assert np.array_equal(FeatureEncoder(other).encode_columns(customers),
+                          FeatureEncoder(scaler).encode_columns(customers))
+
+
+def test_scaler_on_other_columns_is_rejected(customers):
+    other = StandardScaler().fit(pd.DataFrame({'tenure':customers['tenure'], 'x':customers['tenure'],
+                                               'TotalCharges':customers['TotalCharges']}))
+    with pytest.raises(ValueError, match='fitted on'):
+        FeatureEncoder(other)
+
+
+@pytest.mark.parametrize('value, expected', [('Yes', 1), ('1', 1), (True, 1), (1, 1), (1.0, 1), (np.True_, 1),
+                                             ('No', 0), ('0', 0), (False, 0), (0, 0), ('yes', 0), (None, 0)])
+def test_mixed_yes_no_values(customers, value, expected):
+    base = {c:customers[c][0] for c in RAW_COLUMNS}
+    other = {**base, 'Partner':'No'}
+    record = {**base, 'Partner':value}
+    enc = FeatureEncoder()
+    i = FEATURE_NAMES.index('Partner')
+    assert enc.encode_record(record)[0, i] == expected
+    # Same answer whatever else shares the batch.
+    for batch in ([record, other], [other, record, other]):
+        cols = {c:[r[c] for r in batch] for c in RAW_COLUMNS}
+        got = enc.encode_columns(cols)[:, i]
+        assert got[batch.index(record)] == expected
+        assert np.array_equal(got, np.vstack([enc.encode_record(r) for r in batch])[:, i])
+
+
+def test_unknown_levels_are_counted(customers):
+    df = pd.DataFrame(customers).head(10).copy()
+    df.loc[0, 'Contract'] = 'one year'
+    df.loc[1, 'Contract'] = None
+    df.loc[1, 'PaymentMethod'] = 'Cash'
+    enc = FeatureEncoder()
+    enc.encode_columns(df)
+    assert enc.unknown_rows == 2
+    assert enc.unknown['Contract'] == 2 and enc.unknown['PaymentMethod'] == 1
+    enc.encode_record(df.iloc[0].to_dict())
+    assert enc.unknown_rows == 3
+
+
+def test_numeric_columns_scaled_in_place(customers, scaler):
+    X = FeatureEncoder(scaler).encode_columns(customers)
+    ref = scaler.transform(pd.DataFrame({c:customers[c] for c in NUM_FEATURES}))
+    idx = [FEATURE_NAMES.index(c) for c in NUM_FEATURES]
+    assert np.allclose(X[:, idx], ref, atol=1e-5)
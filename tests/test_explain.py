@@ -0,0 +1,15 @@
+import numpy as np
+
+from retainiq.explain import FIELDS, TreeExplainer, check_additivity
+from retainiq.forest import CompiledForest
+
+
+def test_explainer_is_additive(forest, X):
+    assert check_additivity(TreeExplainer(CompiledForest.from_sklearn(forest)), X) == []
+
+
+def test_fields_sum_to_columns(forest, X):
+    explainer = TreeExplainer(CompiledForest.from_sklearn(forest))
+    fields = explainer.field_contributions(X[:50])
+    assert fields.shape == (50, len(FIELDS))
+    assert np.allclose(fields.sum(axis=1), explainer.contributions(X[:50]).sum(axis=1))
@@ -0,0 +1,14 @@
+import numpy as np
+
+from retainiq.forest import CompiledForest, check_parity
+
+
+def test_compiled_matches_sklearn(forest, X):
+    assert check_parity(forest, X) == []
+
+
+def test_single_rows_match_batch(forest, X):
+    compiled = CompiledForest.from_sklearn(forest)
+    batch = compiled.predict_proba(X[:20])
+    rows = np.vstack([compiled.predict_proba(X[i:i+1]) for i in range(20)])
+    assert np.array_equal(batch, rows)
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from retainiq.cohorts import MEASURES, build_from_store
+from retainiq.config import ID_COLUMN, RAW_COLUMNS, risk_band
+from retainiq.incremental import IncrementalScorer, ScoreStore, main
+from retainiq.inference import predict_proba
+
+
+class _CountingModel:
+    """Wraps a model and records how many rows each predict_proba call scored."""
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = []
+
+    def predict_proba(self, X):
+        self.calls.append(len(X))
+        return self.model.predict_proba(X)
+
+
+@pytest.fixture
+def base(customers):
+    df = pd.DataFrame({c:customers[c][:200] for c in RAW_COLUMNS})
+    df.insert(0, ID_COLUMN, [f'C{i:04d}' for i in range(len(df))])
+    return df
+
+
+@pytest.fixture
+def scorer(tmp_path, base, forest, scaler):
+    from retainiq.cohorts import Cube
+    with ScoreStore(str(tmp_path / 'scores.db')) as store:
+        scorer = IncrementalScorer(store, _CountingModel(forest), scaler, Cube())
+        scorer.load([base])
+        scorer.model.calls.clear()
+        yield scorer
+
+
+def _events(records):
+    return pd.DataFrame(records)
+
+
+def test_noop_events_skip_the_model(scorer, base):
+    events = _events([{ID_COLUMN:base[ID_COLUMN][i], 'Contract':base['Contract'][i]} for i in range(10)])
+    deltas, stats = scorer.apply(events)
+    assert scorer.model.calls == []
+    assert deltas.empty
+    assert (stats['rescored'], stats['unchanged']) == (0, 10)
+
+
+def test_changes_are_scored_in_one_call(scorer, base, forest, scaler):
+    from retainiq.encoding import FeatureEncoder
+    events = _events([{ID_COLUMN:base[ID_COLUMN][i], 'tenure':float(base['tenure'][i]) + 12} for i in range(5)]
+                     + [{ID_COLUMN:base[ID_COLUMN][9], 'Contract':base['Contract'][9]}])
+    deltas, stats = scorer.apply(events)
+    assert scorer.model.calls == [5]
+    assert (stats['rescored'], stats['unchanged']) == (5, 1)
+    expected = base[:5].assign(tenure=base['tenure'][:5] + 12)
+    assert np.allclose(deltas['churn_probability'], predict_proba(forest, FeatureEncoder(scaler).encode_columns(expected)))
+
+
+def test_numeric_senior_citizen_then_yes_event(tmp_path, base, forest, scaler):
+    base = base.assign(SeniorCitizen=(base['SeniorCitizen'] == 'Yes').astype(int))
+    senior = base.index[base['SeniorCitizen'] == 1][0]
+    junior = base.index[base['SeniorCitizen'] == 0][0]
+    with ScoreStore(str(tmp_path / 'scores.db')) as store:
+        scorer = IncrementalScorer(store, forest, scaler)
+        scorer.load([base])
+        deltas, stats = scorer.apply(_events([{ID_COLUMN:base[ID_COLUMN][i], 'SeniorCitizen':'Yes'}
+                                              for i in (senior, junior)]))
+    assert list(deltas[ID_COLUMN]) == [base[ID_COLUMN][junior]]
+    assert (stats['rescored'], stats['unchanged']) == (1, 1)
+
+
+def test_new_ids_need_a_complete_record(scorer, base):
+    full = {**{c:base[c][0] for c in RAW_COLUMNS}, ID_COLUMN:'NEW1'}
+    events = _events([full, {ID_COLUMN:'NEW2', 'tenure':3.0}])
+    n = len(scorer.store)
+    deltas, stats = scorer.apply(events)
+    assert (stats['new'], stats['incomplete']) == (1, 1)
+    assert list(deltas[ID_COLUMN]) == ['NEW1']
+    assert deltas['transition'][0] == 'NEW→' + deltas['risk_band'][0]
+    assert np.isnan(deltas['previous_probability'][0])
+    assert len(scorer.store) == n + 1
+
+
+def test_band_transitions(scorer, base):
+    stored = scorer.store.fetch(base[ID_COLUMN])
+    bands = stored['risk_band']
+    # Give one customer another customer's record in a different band; the new score is known in advance.
+    src, dst = next((a, b) for a in stored.index for b in stored.index if bands[a] != bands[b])
+    record = base.set_index(ID_COLUMN).loc[dst, RAW_COLUMNS].to_dict()
+    deltas, stats = scorer.apply(_events([{ID_COLUMN:src, **record}]))
+    assert stats['transitions'] == 1
+    assert deltas['transition'][0] == f'{bands[src]}→{bands[dst]}'
+    assert deltas['churn_probability'][0] == pytest.approx(stored['churn_probability'][dst])
+    assert deltas['risk_band'][0] == risk_band(stored['churn_probability'][dst])
+
+
+def test_cube_tracks_store(scorer, base):
+    events = _events([{ID_COLUMN:base[ID_COLUMN][i], 'tenure':float(base['tenure'][i]) + 30,
+                       'Contract':'Month-to-month'} for i in range(0, 200, 3)]
+                     + [{**{c:base[c][1] for c in RAW_COLUMNS}, ID_COLUMN:'NEW1'}])
+    scorer.apply(events)
+    expected = build_from_store(scorer.store)
+    for m in MEASURES:
+        assert np.allclose(scorer.cube.data[m], expected.data[m])
+
+
+def test_init_refuses_non_empty_store(tmp_path, base, forest, scaler, monkeypatch):
+    import pickle
+    for name, obj in (('model.pkl', forest), ('scaler.pkl', scaler)):
+        with open(tmp_path / name, 'wb') as f:
+            pickle.dump(obj, f)
+    monkeypatch.chdir(tmp_path)
+    base.to_csv('all.csv', index=False)
+    base[:50].to_csv('some.csv', index=False)
+    assert main(['init', 'all.csv']) == 0
+    with pytest.raises(SystemExit, match='--replace'):
+        main(['init', 'some.csv'])
+    assert main(['init', 'some.csv', '--replace']) == 0
+    with ScoreStore() as store:
+        assert len(store) == 50
@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from retainiq.config import ID_COLUMN
+from retainiq.parallel import read_range, score_file_parallel, split_csv
+
+
+@pytest.fixture(scope='module')
+def csv_file(tmp_path_factory, customers):
+    path = tmp_path_factory.mktemp('parallel') / 'customers.csv'
+    df = pd.DataFrame(customers).head(300)
+    df.insert(0, ID_COLUMN, [f'C{i:04d}' for i in range(len(df))])
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def _line_ends(path):
+    ends, pos = [], 0
+    with open(path, 'rb') as f:
+        for line in f:
+            pos += len(line)
+            ends.append(pos)
+    return ends   # ends[0] is the end of the header
+
+
+@pytest.mark.parametrize('range_bytes', ['row', 'row+1', 'row-1', 1, 997, 10**9])
+def test_split_csv_covers_every_row_once(csv_file, range_bytes):
+    ends = _line_ends(csv_file)
+    row = ends[1] - ends[0]
+    size = {'row':row, 'row+1':row + 1, 'row-1':row - 1}.get(range_bytes, range_bytes)
+    ranges = split_csv(csv_file, size)
+    assert ranges[0][1] == ends[0] and ranges[-1][2] == ends[-1]
+    assert all(a[2] == b[1] for a, b in zip(ranges, ranges[1:]))
+    assert all(end in ends for _, _, end in ranges)   # every range ends on a line boundary
+    columns = pd.read_csv(csv_file, nrows=0).columns.tolist()
+    ids = pd.concat([read_range(csv_file, t, columns) for t in ranges])[ID_COLUMN].tolist()
+    assert ids == pd.read_csv(csv_file, dtype={ID_COLUMN:str})[ID_COLUMN].tolist()
+
+
+def test_unloadable_model_fails_fast(csv_file, tmp_path):
+    bad = tmp_path / 'model.pkl'
+    bad.write_bytes(b'not a pickle')
+    with pytest.raises(RuntimeError, match='worker failed'):
+        score_file_parallel(csv_file, str(tmp_path / 'out.csv'), workers=1, model_path=str(bad),
+                            scaler_path=str(tmp_path / 'none.pkl'), modelfile_path=str(tmp_path / 'none.riq'))
+    with pytest.raises(FileNotFoundError):
+        score_file_parallel(csv_file, str(tmp_path / 'out.csv'), workers=1, model_path=str(tmp_path / 'missing.pkl'))
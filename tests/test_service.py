@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from retainiq.config import RAW_COLUMNS
+from retainiq.service import MicroBatcher, Stats, create_app
+
+
+class _FlakyScorer:
+    """Fails any batch containing a record marked bad, like encode_columns on a malformed value."""
+
+    def score(self, records):
+        if any(r.get('bad') for r in records):
+            raise ValueError('bad record')
+        return [{'id':r['id']} for r in records]
+
+
+def test_bad_record_fails_alone():
+    async def go():
+        stats = Stats()
+        batcher = MicroBatcher(_FlakyScorer(), stats, max_batch=16, max_wait_ms=50)
+        batcher.start()
+        records = [{'id':i, 'bad':i == 3} for i in range(8)]
+        results = await asyncio.gather(*(batcher.submit(r) for r in records), return_exceptions=True)
+        await batcher.stop()
+        return stats, results
+
+    stats, results = asyncio.run(go())
+    assert isinstance(results[3], ValueError)
+    assert [r['id'] for i, r in enumerate(results) if i != 3] == [0, 1, 2, 4, 5, 6, 7]
+    assert stats.errors == 1
+
+
+def test_non_scalar_fields_are_rejected(forest, scaler, customers):
+    record = {c:customers[c][0].item() for c in RAW_COLUMNS}
+
+    async def go():
+        async with TestClient(TestServer(create_app(forest, scaler, max_wait_ms=20))) as client:
+            ok = await client.post('/score', json=record)
+            bad = await client.post('/score', json={**record, 'Contract':['x'], 'tenure':[1, 2]})
+            return ok.status, bad.status, await bad.json()
+
+    ok, bad, body = asyncio.run(go())
+    assert ok == 200 and bad == 400
+    assert body['fields'] == ['tenure', 'Contract']